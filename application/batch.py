@@ -0,0 +1,89 @@
+import numpy as np
+from application.board import Board
+from application.core import GameCore
+
+
+def generate_boards(n_boards, height, width, n_black_holes, rng):
+    """
+        The function generates black holes of many boards at once with the uniform distribution
+    :param n_boards: int, a number of boards
+    :param height: int, a height of a board
+    :param width: int, a width of a board
+    :param n_black_holes: int, a number of black holes on a board
+    :param rng: np.random.Generator
+    :return:
+        black_holes - np.array of shape (n_boards, height, width) of black hole flags
+    """
+    n_cells = height * width
+
+    # the n_black_holes smallest random keys of every board are its black holes
+    keys = rng.random((n_boards, n_cells))
+    black_holes_index = np.argpartition(keys, n_black_holes - 1, axis=1)[:, :n_black_holes]
+
+    black_holes = np.zeros((n_boards, n_cells), dtype=bool)
+    np.put_along_axis(black_holes, black_holes_index, True, axis=1)
+
+    return black_holes.reshape(n_boards, height, width)
+
+
+def get_holes_matrices(black_holes):
+    """
+        The function converts black holes of many boards to matrices of # of adjacent black hole cells, and marks the
+        black hole cell as -1
+    :param black_holes: np.array of shape (n_boards, height, width) of black hole flags
+    :return:
+        adjacent_black_holes_matrices - np.array of shape (n_boards, height, width)
+    """
+    return Board.get_holes_matrix(black_holes)
+
+
+def play_random(game, order):
+    """
+        The function plays a game by clicking cells which are not open yet in the given order until the game is over
+    :param game: GameCore
+    :param order: np.array of flat cell indexes
+    :return:
+        n_clicks - int, a number of clicks made
+    """
+    n_clicks = 0
+    cell_open = game.board.cell_open
+    for cell in order.tolist():
+        if game.status != GameCore.PLAYING:
+            break
+        if cell_open[cell]:
+            continue
+        game.reveal(cell)
+        n_clicks += 1
+
+    return n_clicks
+
+
+def play_games(n_games, height, width, n_black_holes, rng=None):
+    """
+        The function generates and plays many games headlessly by clicking random cells which are not open yet
+    :param n_games: int, a number of games
+    :param height: int, a height of a board
+    :param width: int, a width of a board
+    :param n_black_holes: int, a number of black holes on a board
+    :param rng: np.random.Generator, a new unseeded generator is used by default
+    :return:
+        results - a dict of np.arrays with a value per game:
+            won - whether the game is won
+            n_clicks - a number of clicks made
+            n_open_cells - a number of open cells at the end of the game
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    black_holes = generate_boards(n_games, height, width, n_black_holes, rng=rng)
+    orders = np.argsort(rng.random((n_games, height * width)), axis=1)
+
+    results = {"won": np.zeros(n_games, dtype=bool),
+               "n_clicks": np.zeros(n_games, dtype=np.int64),
+               "n_open_cells": np.zeros(n_games, dtype=np.int64)}
+    for i in range(n_games):
+        game = GameCore(height=height, width=width, n_black_holes=n_black_holes, black_holes=black_holes[i],
+                        rng=rng)
+        results["n_clicks"][i] = play_random(game, orders[i])
+        results["won"][i] = game.status == GameCore.WON
+        results["n_open_cells"][i] = game.n_open_cells
+
+    return results
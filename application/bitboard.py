@@ -0,0 +1,261 @@
+from functools import lru_cache
+import sys
+import numpy as np
+from application.topology import CACHE_SIZE, RECTANGLE, TORUS
+
+
+def popcount(bits):
+    """
+        The function counts set bits of an int
+    :param bits: int
+    :return:
+        int
+    """
+    return bin(bits).count("1")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_column_masks(height, width):
+    """
+        The function returns masks of a board size which stop horizontal shifts of bit sets from wrapping rows, they
+        are shared by all boards of the same size like the index of adjacent cells
+    :param height: int, a height of the board
+    :param width: int, a width of the board
+    :return:
+        full - int, all cells
+        not_first_column - int, cells out of the first column
+        not_last_column - int, cells out of the last column
+        first_column - int, cells of the first column
+        last_column - int, cells of the last column
+    """
+    full = (1 << height * width) - 1
+    columns = np.tile(np.arange(width), height)
+    not_first_column = BitBoard.to_bits(columns != 0)
+    not_last_column = BitBoard.to_bits(columns != width - 1)
+
+    return full, not_first_column, not_last_column, full & ~not_first_column, full & ~not_last_column
+
+
+class BitBoard:
+    """
+        Flags of a board, and its black holes derived from the board, as bit sets stored in Python ints: the bit i
+        is the cell with the flat index i. Adjacent cells of any set of cells are found with a few shifts of the
+        whole set, so counts, chords and flood fills do not loop over cells.
+        Open cells are kept only by the board, as renderers, the solver and saved games read them cell by cell, and
+        a second copy would have to be kept in step with it. The win check is the running counter of safe cells left
+        of the game, which is cheaper than comparing bit sets of the whole board
+    """
+
+    def __init__(self, height, width, black_holes=0, flagged=0, topology=RECTANGLE):
+        # sizes of numpy types would overflow shifts of the bit sets
+        self.height = int(height)
+        self.width = int(width)
+        self.n_cells = self.height * self.width
+        self.wrap = topology == TORUS
+
+        # masks of cells out of the first and the last columns, they stop horizontal shifts from wrapping rows, on a
+        # torus the cells of the first and the last columns are moved to the opposite edge instead
+        self.full, self.not_first_column, self.not_last_column, self.first_column, self.last_column = \
+            get_column_masks(self.height, self.width)
+
+        self.black_holes = black_holes
+        self.flagged = flagged
+        self.zero = None
+
+    @classmethod
+    def from_arrays(cls, height, width, black_holes, flagged=None, topology=RECTANGLE):
+        """
+            This function creates a bit board from flags of cells
+        :param height: int, a height of the board
+        :param width: int, a width of the board
+        :param black_holes: np.array of black hole flags
+        :param flagged: np.array of flagged cell flags, or None
+        :param topology: str, RECTANGLE or TORUS
+        :return:
+            bit_board - BitBoard
+        """
+        return cls(height, width, black_holes=cls.to_bits(black_holes),
+                   flagged=cls.to_bits(flagged) if flagged is not None else 0, topology=topology)
+
+    @staticmethod
+    def to_bits(mask):
+        """
+            This function packs flags of cells into an int
+        :param mask: np.array of boolean values
+        :return:
+            bits - int
+        """
+        return int.from_bytes(np.packbits(np.asarray(mask, dtype=bool), bitorder="little").tobytes(), "little")
+
+    def to_array(self, bits):
+        """
+            This function unpacks an int into flags of cells
+        :param bits: int
+        :return:
+            mask - np.array of shape (n_cells,) of boolean values
+        """
+        packed = np.frombuffer(bits.to_bytes((self.n_cells + 7) // 8, "little"), dtype=np.uint8)
+
+        return np.unpackbits(packed, count=self.n_cells, bitorder="little").view(bool)
+
+    def to_cells(self, bits):
+        """
+            This function converts an int to flat indexes of its cells
+        :param bits: int
+        :return:
+            cells - np.array of flat cell indexes
+        """
+        return np.flatnonzero(self.to_array(bits))
+
+    @staticmethod
+    def from_cells(cells):
+        """
+            This function converts flat indexes of cells to an int, many cells are packed only over the span from the
+            first to the last of them, so a small area of a large board costs as little as the area
+        :param cells: an iterable of flat cell indexes
+        :return:
+            bits - int
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+
+        # a few cells are set one by one, many cells are packed at once
+        if len(cells) < 16:
+            bits = 0
+            for cell in cells.tolist():
+                bits |= 1 << cell
+            return bits
+
+        first_cell = int(cells.min())
+        mask = np.zeros(int(cells.max()) - first_cell + 1, dtype=bool)
+        mask[cells - first_cell] = True
+
+        return BitBoard.to_bits(mask) << first_cell
+
+    def dilate(self, bits):
+        """
+            This function adds all adjacent cells to a set of cells
+        :param bits: int
+        :return:
+            bits - int
+        """
+        horizontal = bits | ((bits << 1) & self.not_first_column) | ((bits >> 1) & self.not_last_column)
+        if not self.wrap:
+            return (horizontal | (horizontal << self.width) | (horizontal >> self.width)) & self.full
+
+        # on a torus the last column is adjacent to the first one, and the last row is adjacent to the first one
+        horizontal |= ((bits & self.last_column) >> (self.width - 1)) | ((bits & self.first_column) << (self.width - 1))
+        vertical_shift = self.n_cells - self.width
+
+        return (horizontal | (horizontal << self.width) | (horizontal >> self.width) |
+                (horizontal >> vertical_shift) | (horizontal << vertical_shift)) & self.full
+
+    def get_adjacent(self, cell):
+        """
+            This function returns adjacent cells of a cell
+        :param cell: a flat cell index
+        :return:
+            bits - int
+        """
+        cell = int(cell)
+
+        return self.dilate(1 << cell) & ~(1 << cell)
+
+    def place_black_holes(self, black_holes):
+        """
+            This function sets black holes, cells without adjacent black holes are found again
+        :param black_holes: int
+        :return:
+        """
+        self.black_holes = black_holes
+        self.zero = None
+
+    def get_zero(self):
+        """
+            This function returns cells which have no adjacent black holes and are not black holes
+        :return:
+            bits - int
+        """
+        if self.zero is None:
+            self.zero = self.full & ~self.dilate(self.black_holes)
+
+        return self.zero
+
+    def count_adjacent_black_holes(self, cell):
+        """
+            This function counts adjacent black holes of a cell
+        :param cell: a flat cell index
+        :return:
+            int
+        """
+        return popcount(self.get_adjacent(cell) & self.black_holes)
+
+    def count_adjacent_flags(self, cell):
+        """
+            This function counts adjacent flags of a cell
+        :param cell: a flat cell index
+        :return:
+            int
+        """
+        return popcount(self.get_adjacent(cell) & self.flagged)
+
+    def is_flagged(self, cell):
+        """
+            This function checks whether a cell is flagged
+        :param cell: a flat cell index
+        :return:
+            bool
+        """
+        return bool(self.flagged >> int(cell) & 1)
+
+    def toggle_flag(self, cell):
+        """
+            This function flags a closed cell or removes its flag
+        :param cell: a flat cell index
+        :return:
+            flagged - bool, whether the cell is flagged now
+        """
+        self.flagged ^= 1 << int(cell)
+
+        return self.is_flagged(cell)
+
+    def get_chord(self, cell):
+        """
+            This function finds cells opened by a chord on an open cell: if the cell has as many adjacent flags as
+            adjacent black holes, all its adjacent cells without flags are opened, open ones among them are left to
+            the board
+        :param cell: a flat index of an open cell
+        :return:
+            bits - int, empty if the chord is not possible
+        """
+        adjacent = self.get_adjacent(cell)
+        if popcount(adjacent & self.flagged) != popcount(adjacent & self.black_holes):
+            return 0
+
+        return adjacent & ~self.flagged
+
+    def flood(self, bits):
+        """
+            This function adds all cells opened together with a set of safe cells: adjacent cells of cells without
+            adjacent black holes are added until the set stops growing
+        :param bits: int, safe cells
+        :return:
+            bits - int
+        """
+        zero = self.get_zero()
+        while True:
+            grown = bits | self.dilate(bits & zero)
+            if grown == bits:
+                return bits
+            bits = grown
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of the bit sets of the board, the column masks are shared by boards of
+            the same size, so they are not counted
+        :return:
+            int
+        """
+        bit_sets = (self.black_holes, self.flagged, self.zero)
+
+        return sum(sys.getsizeof(bits) for bits in bit_sets if bits is not None)
@@ -0,0 +1,185 @@
+import numpy as np
+from application.topology import RECTANGLE, TORUS, check_topology, get_topology
+
+
+class Board:
+    def __init__(self, height, width, topology=RECTANGLE):
+        # initializing the basic properties
+        self.height = height
+        self.width = width
+        self.n_cells = height * width
+
+        # defining flat arrays of black holes, and open cells, # of adjacent black holes are calculated on the first
+        # access after black holes are placed
+        self.black_holes = np.zeros(self.n_cells, dtype=bool)
+        self.cell_open = np.zeros(self.n_cells, dtype=bool)
+        self._adjacent_black_holes = None
+
+        # the index of adjacent cells is taken on the first flood fill, it is shared by all boards of the same size
+        # and topology
+        check_topology(height, width, topology)
+        self.topology_kind = topology
+        self._topology = None
+
+    @property
+    def adjacent_black_holes(self):
+        """
+            The property returns # of adjacent black holes for every cell, calculating it on the first access
+        :return:
+            adjacent_black_holes - np.array of int8 counts
+        """
+        if self._adjacent_black_holes is None:
+            self.calculate_adjacent_black_holes()
+
+        return self._adjacent_black_holes
+
+    @property
+    def topology(self):
+        """
+            The property returns the index of adjacent cells, building it only if no recent board had the same size
+        :return:
+            topology - Topology
+        """
+        if self._topology is None:
+            self._topology = get_topology(self.height, self.width, self.topology_kind)
+
+        return self._topology
+
+    def place_black_holes(self, cells):
+        """
+            The function marks the given cells as black holes, # of adjacent black holes is recalculated on the next
+            access
+        :param cells: np.array of flat cell indexes
+        """
+        self.black_holes[:] = False
+        self.black_holes[cells] = True
+        self._adjacent_black_holes = None
+
+    def calculate_adjacent_black_holes(self):
+        """
+            The function calculates a number of adjacent black holes for every cell
+        """
+        black_holes_matrix = self.black_holes.reshape(self.height, self.width)
+        self._adjacent_black_holes = self.count_adjacent(black_holes_matrix).reshape(-1)
+
+    def count_adjacent(self, matrix):
+        """
+            The function counts adjacent marked cells of all cells at once following the topology of the board
+        :param matrix: np.array of shape (height, width), or (n_boards, height, width) for many boards, of boolean
+            marks of cells
+        :return:
+            adjacent_matrix - np.array of the same shape of int8 counts
+        """
+        return self.count_adjacent_black_holes(matrix, wrap=self.topology_kind == TORUS)
+
+    @staticmethod
+    def count_adjacent_black_holes(black_holes_matrix, wrap=False):
+        """
+            The function counts adjacent black holes of all cells at once with a padded 3x3 shifted sum
+        :param black_holes_matrix: np.array of shape (height, width), or (n_boards, height, width) for many boards,
+            of black hole flags
+        :param wrap: bool, whether the edges of the board wrap around like on a torus
+        :return:
+            adjacent_black_holes_matrix - np.array of the same shape of int8 counts
+        """
+        height, width = black_holes_matrix.shape[-2:]
+
+        # padding the matrix with a border of empty cells, so the shifted windows never leave it, on a torus the
+        # border repeats the opposite edges
+        if wrap:
+            pad_width = [(0, 0)] * (black_holes_matrix.ndim - 2) + [(1, 1), (1, 1)]
+            padded = np.pad(black_holes_matrix.astype(np.int8), pad_width, mode="wrap")
+        else:
+            padded = np.zeros(black_holes_matrix.shape[:-2] + (height + 2, width + 2), dtype=np.int8)
+            padded[..., 1:-1, 1:-1] = black_holes_matrix
+
+        # summing the 3x3 window as two separable 1x3 passes, and removing the cell itself
+        rows_sum = padded[..., :-2, :] + padded[..., 1:-1, :] + padded[..., 2:, :]
+        window_sum = rows_sum[..., :-2] + rows_sum[..., 1:-1] + rows_sum[..., 2:]
+
+        return window_sum - padded[..., 1:-1, 1:-1]
+
+    @staticmethod
+    def get_holes_matrix(black_holes_matrix):
+        """
+            The function builds a matrix of # of adjacent black hole cells straight from black hole flags, and marks
+            the black hole cell as -1
+        :param black_holes_matrix: np.array of shape (height, width), or (n_boards, height, width) for many boards,
+            of black hole flags
+        :return:
+            adjacent_black_holes_matrix - np.array of the same shape
+        """
+        black_holes_matrix = np.asarray(black_holes_matrix, dtype=bool)
+        adjacent_black_holes_matrix = Board.count_adjacent_black_holes(black_holes_matrix)
+
+        return np.where(black_holes_matrix, -1, adjacent_black_holes_matrix).astype(int)
+
+    def get_adjacent_holes_matrix(self):
+        """
+            The function converts the board to a matrix of # of adjacent black hole cells, and marks the black hole
+            cell as -1
+        :return:
+            adjacent_black_holes_matrix - np.array of shape (height, width)
+        """
+        adjacent_black_holes_matrix = np.where(self.black_holes, -1, self.adjacent_black_holes).astype(int)
+
+        return adjacent_black_holes_matrix.reshape(self.height, self.width)
+
+    def get_all_cells_to_open(self, cell):
+        """
+            The function finds all adjacent cells to open while opening a specific cell
+        :param cell: a flat index of the cell
+        :return:
+            all_cells_to_open - np.array of flat cell indexes
+        """
+        return self.get_all_cells_to_open_batch([cell])
+
+    def get_all_cells_to_open_batch(self, cells):
+        """
+            The function finds all adjacent cells to open while opening several cells at once. Only the cells which
+            are open are touched: the flood fill opens adjacent cells of a whole front of cells with zero adjacent
+            black holes at once, straight from the index of adjacent cells
+        :param cells: an iterable of flat cell indexes, cells with adjacent black holes are opened on their own
+        :return:
+            all_cells_to_open - np.array of unique flat cell indexes
+        """
+        adjacent_black_holes = self.adjacent_black_holes
+        black_holes = self.black_holes
+        cells = np.unique(np.fromiter(cells, dtype=np.int64))
+
+        # defining marks of cells to be open and a front of cells with zero adjacent black hole cells, only such
+        # cells open their adjacent cells
+        to_open = np.zeros(self.n_cells, dtype=bool)
+        to_open[cells] = True
+        all_cells_to_open = [cells]
+        front = cells[(adjacent_black_holes[cells] == 0) & ~black_holes[cells]]
+
+        # while there is any cells with zero adjacent black hole -> open their adjacent cells which are not marked yet
+        while len(front) != 0:
+            adjacent = self.topology.get_adjacent_batch(front)[0]
+            adjacent = np.unique(adjacent[~to_open[adjacent]])
+            to_open[adjacent] = True
+            all_cells_to_open.append(adjacent)
+            front = adjacent[(adjacent_black_holes[adjacent] == 0) & ~black_holes[adjacent]]
+
+        return np.concatenate(all_cells_to_open)
+
+    def calculate_open_cells(self):
+        """
+            The function calculates # of open cells
+        :return:
+            n_open_cells - int
+        """
+        return int(self.cell_open.sum())
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of arrays of the board, the index of adjacent cells is shared by boards of
+            the same size, so it is not counted
+        :return:
+            int
+        """
+        arrays = (self.black_holes, self.cell_open, self._adjacent_black_holes)
+
+        return sum(array.nbytes for array in arrays if array is not None)
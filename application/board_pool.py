@@ -0,0 +1,126 @@
+from collections import deque
+import threading
+import numpy as np
+
+
+class BoardPool:
+    """
+        A bounded pool of games generated in a background thread for the current settings. Taking a game wakes the
+        thread up to refill the pool, and changing the settings drops games of the previous settings. A disabled
+        pool creates every game when it is taken. The n-th game of the settings always has the same seed, whether it
+        is pre-generated or not, so games of a fixed seed do not depend on timing
+    """
+
+    def __init__(self, create_game, seed=None, size=2, enabled=True):
+        self.create_game = create_game
+        self.size = size
+        self.enabled = enabled
+        self.entropy = seed if seed is not None else np.random.SeedSequence().entropy
+
+        # games of the current settings with their numbers, and # of games taken of every settings
+        self.key = None
+        self.games = deque()
+        self.n_taken = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+    @classmethod
+    def from_settings(cls, settings, create_game):
+        """
+            This function creates the pool from the settings, games whose black holes are placed on the first click are
+            pre-generated with their board, index of adjacent cells and generator of random numbers
+        :param settings: Settings
+        :param create_game: a function which takes the settings key of a game and a seed, and returns a new game
+        :return:
+            board_pool - BoardPool
+        """
+        board_pool = settings.board_pool or {}
+
+        return cls(create_game=create_game, seed=settings.seed, size=board_pool.get("SIZE", 2),
+                   enabled=board_pool.get("ENABLED", False))
+
+    def get_seed(self, key, index):
+        """
+            This function derives a seed of a game from the seed of the pool, the settings, and the number of the game
+        :param key: a tuple of ints of the settings
+        :param index: int, the number of the game of the settings
+        :return:
+            seed - int
+        """
+        seed_sequence = np.random.SeedSequence(self.entropy, spawn_key=tuple(int(value) for value in key) + (index,))
+
+        return int(np.random.default_rng(seed_sequence).integers(2 ** 63))
+
+    def configure(self, key):
+        """
+            This function sets the settings of next games, games of other settings are dropped
+        :param key: a tuple of ints of the settings, e.g. a height, a width, and # of black holes
+        :return:
+        """
+        if not self.enabled:
+            return
+
+        with self.condition:
+            if key != self.key:
+                self.key = key
+                self.games.clear()
+                self.condition.notify()
+        self.start()
+
+    def take(self, key):
+        """
+            This function returns a pre-generated game of the settings, or creates one if the pool is empty
+        :param key: a tuple of ints of the settings
+        :return:
+            game - a game returned by create_game
+        """
+        self.configure(key)
+        with self.condition:
+            index = self.n_taken.get(key, 0)
+            self.n_taken[key] = index + 1
+            game = self.games.popleft()[1] if self.games else None
+            self.condition.notify()
+
+        return game if game is not None else self.create_game(key, self.get_seed(key, index))
+
+    def start(self):
+        """
+            This function starts the pool thread on the first use
+        :return:
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="board-pool", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        """
+            This function fills the pool until it is closed, a game generated for settings which changed meanwhile, or
+            whose number was taken meanwhile, is dropped
+        :return:
+        """
+        while True:
+            with self.condition:
+                while not self.closed and len(self.games) >= self.size:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                key = self.key
+                index = self.n_taken.get(key, 0) + len(self.games)
+
+            game = self.create_game(key, self.get_seed(key, index))
+
+            with self.condition:
+                if key == self.key and len(self.games) < self.size and \
+                        index == self.n_taken.get(key, 0) + len(self.games):
+                    self.games.append((index, game))
+
+    def close(self):
+        """
+            This function stops the pool thread
+        :return:
+        """
+        with self.condition:
+            self.closed = True
+            self.games.clear()
+            self.condition.notify()
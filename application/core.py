@@ -0,0 +1,248 @@
+import numpy as np
+from application.bitboard import BitBoard
+from application.board import Board
+from application.topology import RECTANGLE
+
+
+class GameCore:
+    """
+        A headless game: board generation, revealing cells, and the win/loss state without any widgets
+    """
+    PLAYING = "playing"
+    WON = "won"
+    LOST = "lost"
+
+    def __init__(self, height, width, n_black_holes, black_holes=None, rng=None, seed=None, first_click_safe=False,
+                 topology=RECTANGLE):
+        # defining a generator of random numbers of the game, the seed is kept to replay the game
+        if rng is None:
+            seed = seed if seed is not None else np.random.SeedSequence().entropy
+            rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.rng = rng
+
+        # initializing the basic properties
+        self.height = height
+        self.width = width
+        self.n_black_holes = n_black_holes
+        self.first_click_safe = first_click_safe
+        self.topology = topology
+        self.black_holes_placed = False
+        self.status = self.PLAYING
+
+        # defining a board, black holes, and adjacent black holes cells, in the first click safe mode black holes
+        # are generated on the first click
+        self.board = Board(height=height, width=width, topology=topology)
+        self.bits = BitBoard(height=height, width=width, topology=topology)
+        if black_holes is not None:
+            self.board.place_black_holes(np.flatnonzero(black_holes))
+            self.bits.place_black_holes(self.bits.to_bits(self.board.black_holes))
+            self.black_holes_placed = True
+        elif not first_click_safe:
+            self.generate_black_holes()
+
+        # defining running counters of open cells and safe cells which are still closed
+        self.n_cells_to_open = self.board.n_cells - self.n_black_holes
+        self.n_open_cells = 0
+        self.n_safe_cells_left = self.n_cells_to_open
+
+    @classmethod
+    def restore(cls, height, width, n_black_holes, seed, first_click_safe, black_holes, cell_open, status,
+                cell_flagged=None, topology=RECTANGLE):
+        """
+            The function restores a game from its saved state, # of adjacent black holes is calculated on the first
+            access
+        :param height: int, a height of the board
+        :param width: int, a width of the board
+        :param n_black_holes: int, a number of black holes
+        :param seed: int or None, a seed of the game
+        :param first_click_safe: bool, whether black holes are placed on the first click
+        :param black_holes: np.array of black hole flags, or None if black holes are not placed yet
+        :param cell_open: np.array of open cell flags
+        :param status: str, the state of the game
+        :param cell_flagged: np.array of flagged cell flags, or None if no cells are flagged
+        :param topology: str, RECTANGLE or TORUS
+        :return:
+            game - an object of the class
+        """
+        game = cls.__new__(cls)
+        GameCore.__init__(game, height=height, width=width, n_black_holes=n_black_holes, black_holes=black_holes,
+                          seed=seed, first_click_safe=first_click_safe, topology=topology)
+
+        # restoring open cells, flags and the counters
+        game.board.cell_open[:] = cell_open
+        if cell_flagged is not None:
+            game.bits.flagged = game.bits.to_bits(cell_flagged)
+        game.n_open_cells = int(np.count_nonzero(game.board.cell_open))
+        game.n_safe_cells_left = game.n_cells_to_open - game.n_open_cells
+        game.status = status
+
+        return game
+
+    def generate_black_holes(self, safe_cell=None):
+        """
+            The function generates black holes with the uniform distribution, optionally excluding a cell and its
+            adjacent cells. The excluded cells are skipped by shifting sampled indexes, so there are no retries
+        :param safe_cell: a flat index of the cell which must not have adjacent black holes, or None
+        """
+        # defining sorted cells which can not be black holes, only the cell itself if the board is too small
+        excluded_cells = np.empty(0, dtype=np.int64)
+        if safe_cell is not None:
+            excluded_cells = np.sort(np.append(self.board.topology.get_adjacent(safe_cell), safe_cell))
+            if self.board.n_cells - len(excluded_cells) < self.n_black_holes:
+                excluded_cells = np.array([safe_cell], dtype=np.int64)
+
+        # generating random indexes among the rest cells, and shifting them past the excluded cells
+        black_holes_index = self.rng.choice(self.board.n_cells - len(excluded_cells), size=self.n_black_holes,
+                                            replace=False)
+        black_holes_index += np.searchsorted(excluded_cells - np.arange(len(excluded_cells)), black_holes_index,
+                                             side="right")
+
+        # marking black holes and sharing the information about them among their adjacent cells, the bit set of black
+        # holes is derived from the board
+        self.board.place_black_holes(black_holes_index)
+        self.bits.place_black_holes(self.bits.to_bits(self.board.black_holes))
+        self.black_holes_placed = True
+
+    def calculate_adjacent_black_holes(self):
+        """
+            The function calculates a number of adjacent cells
+        """
+        self.board.calculate_adjacent_black_holes()
+
+    def get_adjacent_holes_matrix(self):
+        """
+            This function convert the board to a matrix of # of adjacent black hole cells, and marks the black hole
+            cell as -1
+        :return:
+        """
+        return self.board.get_adjacent_holes_matrix()
+
+    def get_all_cells_to_open(self, cell):
+        """
+            This function finds all adjacent cells to open while clicking a specific cell
+        :param cell: a flat index of the cell clicked
+        :return:
+        """
+        return self.board.get_all_cells_to_open(cell)
+
+    def get_all_cells_to_open_batch(self, cells):
+        """
+            This function finds all adjacent cells to open while clicking several cells with zero adjacent black
+            hole cells at once
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        return self.board.get_all_cells_to_open_batch(cells)
+
+    def calculate_open_cells(self):
+        """
+            This function recalculates # of open cells from the board, the running counters are updated by reveal
+            without it
+        :return:
+        """
+        self.n_open_cells = self.board.calculate_open_cells()
+
+    @property
+    def cell_flagged(self):
+        """
+            The property returns flags of flagged cells
+        :return:
+            cell_flagged - np.array of shape (n_cells,) of boolean values
+        """
+        return self.bits.to_array(self.bits.flagged)
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of the state of the board: its arrays, and bit sets of flags and black holes
+        :return:
+            int
+        """
+        return self.board.nbytes + self.bits.nbytes
+
+    def reveal(self, cell):
+        """
+            This function opens a cell, and all adjacent cells near to zero adjacent black hole cells, and updates
+            the state of the game. The counters of open cells are updated by # of newly opened cells, so the
+            progress and the win check do not depend on the board size
+        :param cell: a flat index of the cell clicked
+        :return:
+            new_open_cells - np.array of flat indexes of cells which were not open before, its length is # of newly
+            opened cells
+        """
+        # clicks after the end of the game, on open cells, and on flagged cells change nothing
+        if self.status != self.PLAYING or self.board.cell_open[cell] or self.bits.is_flagged(cell):
+            return np.empty(0, dtype=np.int64)
+
+        if not self.black_holes_placed:
+            self.generate_black_holes(safe_cell=cell)
+
+        if self.board.black_holes[cell]:
+            self.status = self.LOST
+            return np.empty(0, dtype=np.int64)
+
+        # if there are non-zero adjacent black hole cells
+        if self.board.adjacent_black_holes[cell] != 0:
+            cells = np.array([cell], dtype=np.int64)
+        else:
+            # otherwise, finding all adjacent not black hole cells near to zero adjacent black hole cells
+            cells = self.get_all_cells_to_open(cell=cell)
+
+        # keeping only cells which are not open yet
+        new_open_cells = cells[~self.board.cell_open[cells]]
+        self.open_cells(new_open_cells)
+
+        return new_open_cells
+
+    def open_cells(self, new_open_cells):
+        """
+            This function marks cells as open, removes wrong flags from them, and updates the counters and the state
+            of the game
+        :param new_open_cells: np.array of flat indexes of cells which are not open
+        :return:
+        """
+        self.board.cell_open[new_open_cells] = True
+        if self.bits.flagged:
+            self.bits.flagged &= ~self.bits.from_cells(new_open_cells)
+        self.n_open_cells += len(new_open_cells)
+        self.n_safe_cells_left -= len(new_open_cells)
+
+        if self.n_safe_cells_left == 0:
+            self.status = self.WON
+
+    def flag(self, cell):
+        """
+            This function flags a closed cell or removes its flag
+        :param cell: a flat index of the cell
+        :return:
+            flagged - bool, whether the cell is flagged now
+        """
+        if self.status != self.PLAYING or self.board.cell_open[cell]:
+            return self.bits.is_flagged(cell)
+
+        return self.bits.toggle_flag(cell)
+
+    def chord(self, cell):
+        """
+            This function opens all closed adjacent cells without flags of an open cell, if the cell has as many
+            adjacent flags as adjacent black holes. A wrong flag loses the game
+        :param cell: a flat index of the open cell
+        :return:
+            new_open_cells - np.array of flat indexes of cells which were not open before
+        """
+        if self.status != self.PLAYING or not self.board.cell_open[cell]:
+            return np.empty(0, dtype=np.int64)
+
+        cells_to_open = self.bits.get_chord(cell)
+        if cells_to_open & self.bits.black_holes:
+            self.status = self.LOST
+            return np.empty(0, dtype=np.int64)
+
+        # opening the cells and areas of zero adjacent black hole cells among them, keeping only cells which are not
+        # open yet
+        cells = self.bits.to_cells(self.bits.flood(cells_to_open))
+        new_open_cells = cells[~self.board.cell_open[cells]]
+        self.open_cells(new_open_cells)
+
+        return new_open_cells
@@ -0,0 +1,186 @@
+import os
+from math import ceil
+import numpy as np
+
+# a colormap of images, "rocket" of seaborn heatmaps is not available without importing seaborn
+COLORMAP = "magma"
+# a color of cells without a value, e.g. open cells of a probability matrix
+NAN_COLOR = (128, 128, 128)
+
+
+def get_colors(n_colors, colormap=COLORMAP):
+    """
+        The function samples colors of a matplotlib colormap
+    :param n_colors: int, a number of colors
+    :param colormap: str, a name of a matplotlib colormap
+    :return:
+        colors - np.array of shape (n_colors, 3) of uint8
+    """
+    from matplotlib import colormaps
+
+    colors = colormaps[colormap](np.linspace(0, 1, n_colors))[:, :3]
+
+    return np.round(colors * 255).astype(np.uint8)
+
+
+def holes_to_image(holes_matrix, scale=1, colormap=COLORMAP):
+    """
+        The function colors matrices of # of adjacent black hole cells, with -1 for black holes, by a lookup table of
+        ten colors, so a whole batch of boards is colored at once
+    :param holes_matrix: np.array of shape (height, width), or (n_boards, height, width) for many boards
+    :param scale: int, a number of pixels per side of a cell
+    :param colormap: str, a name of a matplotlib colormap
+    :return:
+        image - np.array of shape (..., height * scale, width * scale, 3) of uint8
+    """
+    image = get_colors(10, colormap)[np.asarray(holes_matrix) + 1]
+
+    return upscale(image, scale)
+
+
+def values_to_image(matrix, vmin=0., vmax=1., colormap=COLORMAP):
+    """
+        The function colors a matrix of floats, e.g. chances of cells to be black holes, NaN values get NAN_COLOR
+    :param matrix: np.array of shape (..., height, width) of floats
+    :param vmin: float, a value of the first color
+    :param vmax: float, a value of the last color
+    :param colormap: str, a name of a matplotlib colormap
+    :return:
+        image - np.array of shape (..., height, width, 3) of uint8
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    missing = np.isnan(matrix)
+    levels = np.clip((np.where(missing, vmin, matrix) - vmin) / (vmax - vmin) * 255, 0, 255).astype(np.uint8)
+    image = get_colors(256, colormap)[levels]
+    image[missing] = NAN_COLOR
+
+    return image
+
+
+def upscale(image, scale):
+    """
+        The function repeats every pixel of images into a square
+    :param image: np.array of shape (..., height, width, 3)
+    :param scale: int, a number of pixels per side of a pixel
+    :return:
+        image - np.array of shape (..., height * scale, width * scale, 3)
+    """
+    if scale == 1:
+        return image
+
+    return np.repeat(np.repeat(image, scale, axis=-3), scale, axis=-2)
+
+
+def get_downsampling_factor(height, width, max_side):
+    """
+        The function finds how many cells per side are merged into one pixel to fit an image into a size
+    :param height: int, a height of a matrix
+    :param width: int, a width of a matrix
+    :param max_side: int or None, a maximum side of an image in pixels, None to keep every cell
+    :return:
+        factor - int
+    """
+    if max_side is None:
+        return 1
+
+    return max(1, ceil(max(height, width) / max_side))
+
+
+def downsample(matrix, factor):
+    """
+        The function averages blocks of factor x factor cells, blocks at the edges may be smaller
+    :param matrix: np.array of shape (..., height, width)
+    :param factor: int, a number of cells per side of a block
+    :return:
+        matrix - np.array of floats of shape (..., ceil(height / factor), ceil(width / factor))
+    """
+    if factor == 1:
+        return np.asarray(matrix, dtype=float)
+
+    # padding the matrix with NaN up to whole blocks, padded cells are skipped by the mean
+    *batch, height, width = np.shape(matrix)
+    n_rows, n_columns = ceil(height / factor), ceil(width / factor)
+    padded = np.full((*batch, n_rows * factor, n_columns * factor), np.nan)
+    padded[..., :height, :width] = matrix
+
+    blocks = padded.reshape(*batch, n_rows, factor, n_columns, factor)
+    with np.errstate(invalid="ignore"):
+        return np.nanmean(blocks, axis=(-3, -1))
+
+
+def iter_tiles(image, tile_size):
+    """
+        The function splits an image into tiles
+    :param image: np.array of shape (height, width, 3)
+    :param tile_size: int, a side of a tile in pixels, tiles at the edges may be smaller
+    :return:
+        a generator of tuples (row of a tile, column of a tile, tile)
+    """
+    for row in range(0, image.shape[0], tile_size):
+        for column in range(0, image.shape[1], tile_size):
+            yield row // tile_size, column // tile_size, image[row:row + tile_size, column:column + tile_size]
+
+
+def save_png(image, path, compress_level=1):
+    """
+        The function saves an image to PNG, fast compression is enough for boards
+    :param image: np.array of shape (height, width, 3) of uint8
+    :param path: str, a path of the file
+    :param compress_level: int, a zlib compression level from 0 to 9
+    :return:
+    """
+    from PIL import Image
+
+    Image.fromarray(image).save(path, format="png", compress_level=compress_level)
+
+
+def save_tiles(image, directory, tile_size, prefix="tile", compress_level=1):
+    """
+        The function saves tiles of a huge image to PNG files named by the row and the column of a tile
+    :param image: np.array of shape (height, width, 3) of uint8
+    :param directory: str, a directory of the files
+    :param tile_size: int, a side of a tile in pixels
+    :param prefix: str, a prefix of file names
+    :param compress_level: int, a zlib compression level from 0 to 9
+    :return:
+        paths - a list of paths of the files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for row, column, tile in iter_tiles(image, tile_size):
+        paths.append(os.path.join(directory, f"{prefix}_{row}_{column}.png"))
+        save_png(tile, paths[-1], compress_level=compress_level)
+
+    return paths
+
+
+def export_boards(holes_matrices, directory, prefix="board", scale=1, max_side=None, colormap=COLORMAP,
+                  compress_level=1):
+    """
+        The function exports a corpus of boards to PNG files, all boards are colored in one pass
+    :param holes_matrices: np.array of shape (n_boards, height, width) of # of adjacent black hole cells, with -1
+        for black holes, e.g. from Board.get_holes_matrix
+    :param directory: str, a directory of the files
+    :param prefix: str, a prefix of file names
+    :param scale: int, a number of pixels per side of a cell
+    :param max_side: int or None, a maximum side of an image in cells, larger boards are downsampled
+    :param colormap: str, a name of a matplotlib colormap
+    :param compress_level: int, a zlib compression level from 0 to 9
+    :return:
+        paths - a list of paths of the files
+    """
+    n_boards, height, width = np.shape(holes_matrices)
+    factor = get_downsampling_factor(height, width, max_side)
+    if factor == 1:
+        images = holes_to_image(holes_matrices, scale=scale, colormap=colormap)
+    else:
+        images = upscale(values_to_image(downsample(holes_matrices, factor), vmin=-1, vmax=8, colormap=colormap),
+                         scale)
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(n_boards):
+        paths.append(os.path.join(directory, f"{prefix}_{i:0{len(str(n_boards))}}.png"))
+        save_png(images[i], paths[-1], compress_level=compress_level)
+
+    return paths
@@ -0,0 +1,182 @@
+from collections import deque
+from contextlib import nullcontext
+import json
+import threading
+import time
+import numpy as np
+
+# a reusable context manager which is returned instead of a timer when the instrumentation is disabled
+NULL_TIMER = nullcontext()
+
+
+class LatencyStats:
+    """
+        Latencies of one section of code over a rolling window of the latest calls, latencies are added by the loop
+        and worker threads, so the window is changed and read under a lock
+    """
+
+    def __init__(self, window, buckets_ms):
+        self.samples = deque(maxlen=window)
+        self.buckets_ms = list(buckets_ms)
+        self.n_calls = 0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        """
+            This function adds a latency of a call
+        :param seconds: float
+        :return:
+        """
+        with self.lock:
+            self.samples.append(seconds)
+            self.n_calls += 1
+
+    def get_samples(self):
+        """
+            This function returns a copy of latencies of the window
+        :return:
+            samples - np.array of seconds
+        """
+        with self.lock:
+            return np.fromiter(self.samples, dtype=float, count=len(self.samples))
+
+    def get_histogram(self, samples=None):
+        """
+            This function counts latencies of the window per bucket, the last bucket has all slower calls
+        :param samples: np.array of seconds, a copy of the window by default
+        :return:
+            histogram - a dict of bucket labels to counts
+        """
+        samples = samples if samples is not None else self.get_samples()
+        edges = np.array(self.buckets_ms) / 1000
+        counts = np.bincount(np.searchsorted(edges, samples), minlength=len(edges) + 1)
+        labels = [f"<={bucket}ms" for bucket in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+
+        return dict(zip(labels, counts.tolist()))
+
+    def to_dict(self):
+        """
+            This function converts the statistics to a dict
+        :return:
+            stats - dict
+        """
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return {"n_calls": self.n_calls, "window": 0}
+
+        samples_ms = samples * 1000
+        p50, p90, p99 = np.percentile(samples_ms, [50, 90, 99])
+
+        return {"n_calls": self.n_calls,
+                "window": len(samples_ms),
+                "mean_ms": float(samples_ms.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(samples_ms.max()),
+                "histogram": self.get_histogram(samples)}
+
+
+class Timer:
+    """
+        A context manager which adds the time spent inside it to latency statistics
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add(time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """
+        Latency statistics of named sections of code, a disabled instrumentation only returns a shared no-op context
+    """
+
+    def __init__(self, enabled=False, window=1000, buckets_ms=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)):
+        self.enabled = enabled
+        self.window = window
+        self.buckets_ms = buckets_ms
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+            This function creates the instrumentation from the settings
+        :param settings: Settings
+        :return:
+            instrumentation - Instrumentation
+        """
+        instrumentation = settings.instrumentation or {}
+
+        return cls(enabled=instrumentation.get("ENABLED", False),
+                   window=instrumentation.get("WINDOW", 1000),
+                   buckets_ms=instrumentation.get("BUCKETS_MS", (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)))
+
+    def timer(self, name):
+        """
+            This function returns a context manager which times a section of code
+        :param name: str, a name of the section
+        :return:
+            Timer, or a no-op context if the instrumentation is disabled
+        """
+        if not self.enabled:
+            return NULL_TIMER
+
+        return Timer(self.get_stats(name))
+
+    def record(self, name, seconds):
+        """
+            This function adds a latency measured outside of a timer, e.g. from a click to its update on the screen
+        :param name: str, a name of the section
+        :param seconds: float
+        :return:
+        """
+        if self.enabled:
+            self.get_stats(name).add(seconds)
+
+    def get_stats(self, name):
+        """
+            This function returns statistics of a section, creating them on the first call from any thread
+        :param name: str, a name of the section
+        :return:
+            stats - LatencyStats
+        """
+        with self.lock:
+            if name not in self.stats:
+                self.stats[name] = LatencyStats(window=self.window, buckets_ms=self.buckets_ms)
+
+            return self.stats[name]
+
+    def to_dict(self):
+        """
+            This function converts statistics of all sections to a dict
+        :return:
+            stats - dict
+        """
+        with self.lock:
+            stats = dict(self.stats)
+
+        return {name: section_stats.to_dict() for name, section_stats in stats.items()}
+
+    def to_json(self, path=None):
+        """
+            This function dumps statistics of all sections to JSON
+        :param path: str, a path of a file to write, or None
+        :return:
+            JSON string
+        """
+        dump = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(dump)
+
+        return dump
@@ -0,0 +1,163 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import os
+import numpy as np
+from application.batch import play_games
+
+
+class SimulationStats:
+    """
+        Aggregated statistics of simulated games of one board configuration
+    """
+
+    def __init__(self, height, width, n_black_holes):
+        self.height = height
+        self.width = width
+        self.n_black_holes = n_black_holes
+        self.n_games = 0
+        self.n_won = 0
+        self.n_clicks = 0
+        self.n_open_cells = 0
+        self.n_chunks = 0
+
+    def add(self, chunk_stats):
+        """
+            This function adds statistics of a chunk of games
+        :param chunk_stats: a dict returned by simulate_chunk
+        :return:
+        """
+        self.n_games += chunk_stats["n_games"]
+        self.n_won += chunk_stats["n_won"]
+        self.n_clicks += chunk_stats["n_clicks"]
+        self.n_open_cells += chunk_stats["n_open_cells"]
+        self.n_chunks += 1
+
+    def to_dict(self):
+        """
+            This function converts the statistics to a dict
+        :return:
+            stats - dict
+        """
+        return {"height": self.height,
+                "width": self.width,
+                "n_black_holes": self.n_black_holes,
+                "n_games": self.n_games,
+                "n_chunks": self.n_chunks,
+                "win_rate": self.n_won / self.n_games if self.n_games else 0.0,
+                "mean_clicks": self.n_clicks / self.n_games if self.n_games else 0.0,
+                "mean_open_cells": self.n_open_cells / self.n_games if self.n_games else 0.0}
+
+
+def get_difficulty_configs(difficulty_dict):
+    """
+        The function converts difficulty presets to board configurations
+    :param difficulty_dict: a dict of difficulty levels from the settings
+    :return:
+        configs - a dict of difficulty levels to (height, width, n_black_holes), custom levels are skipped
+    """
+    return {name: (size, size, n_black_holes) for name, (size, n_black_holes, _) in difficulty_dict.items()
+            if size > 0}
+
+
+def create_work_units(configs, n_games, chunk_size, seed=None):
+    """
+        The function splits simulations into chunks, every chunk gets its own child of the root seed sequence, so the
+        results do not depend on the number of workers and the order of execution
+    :param configs: a dict of keys to (height, width, n_black_holes)
+    :param n_games: int, a number of games per configuration
+    :param chunk_size: int, a maximum number of games in a chunk
+    :param seed: int or None, the root seed
+    :return:
+        work_units - a list of tuples (key, height, width, n_black_holes, n_games, seed_sequence)
+    """
+    chunks = []
+    for key, (height, width, n_black_holes) in configs.items():
+        for start in range(0, n_games, chunk_size):
+            chunks.append((key, height, width, n_black_holes, min(chunk_size, n_games - start)))
+
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    return [chunk + (seed_sequence,) for chunk, seed_sequence in zip(chunks, seed_sequences)]
+
+
+def get_seed(seed_sequence):
+    """
+        The function draws an int seed of a game from a child of the root seed sequence, the game keeps the int to be
+        saved and replayed
+    :param seed_sequence: np.random.SeedSequence
+    :return:
+        seed - int
+    """
+    return int(np.random.default_rng(seed_sequence).integers(2 ** 63))
+
+
+def map_work_units(function, work_units, n_workers=None):
+    """
+        The function runs work units in a process pool and yields their results in the order of the work units. Work
+        units which are not started yet are cancelled when the caller stops early, one worker runs them in the
+        process itself
+    :param function: a function of a work unit defined at the top level of a module, so workers can import it
+    :param work_units: a list of work units
+    :param n_workers: int, a number of worker processes, all cores are used by default
+    :return:
+        a generator of results of the function
+    """
+    if n_workers == 1:
+        yield from map(function, work_units)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=n_workers or os.cpu_count())
+    try:
+        yield from executor.map(function, work_units)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def simulate_chunk(work_unit):
+    """
+        The function plays a chunk of games in a worker process
+    :param work_unit: a tuple (key, height, width, n_black_holes, n_games, seed_sequence)
+    :return:
+        key - a key of the configuration
+        chunk_stats - a dict of summed statistics of the chunk
+    """
+    key, height, width, n_black_holes, n_games, seed_sequence = work_unit
+    results = play_games(n_games, height, width, n_black_holes, rng=np.random.default_rng(seed_sequence))
+
+    return key, {"n_games": n_games,
+                 "n_won": int(results["won"].sum()),
+                 "n_clicks": int(results["n_clicks"].sum()),
+                 "n_open_cells": int(results["n_open_cells"].sum())}
+
+
+def run_simulations(configs, n_games, chunk_size=1000, n_workers=None, seed=None):
+    """
+        The function plays games of several board configurations in a process pool and streams the aggregated
+        statistics back as chunks are done
+    :param configs: a dict of keys to (height, width, n_black_holes)
+    :param n_games: int, a number of games per configuration
+    :param chunk_size: int, a maximum number of games in a chunk
+    :param n_workers: int, a number of worker processes, all cores are used by default
+    :param seed: int or None, the root seed, the same seed gives the same statistics
+    :return:
+        a generator of tuples (key, SimulationStats) yielded after every finished chunk
+    """
+    stats = {key: SimulationStats(height, width, n_black_holes)
+             for key, (height, width, n_black_holes) in configs.items()}
+    work_units = create_work_units(configs, n_games, chunk_size, seed=seed)
+
+    with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(simulate_chunk, work_unit) for work_unit in work_units]
+        for future in as_completed(futures):
+            key, chunk_stats = future.result()
+            stats[key].add(chunk_stats)
+            yield key, stats[key]
+
+
+if __name__ == '__main__':
+    with open('config.json', 'r+') as f:
+        configs = json.load(f)
+
+    for key, key_stats in run_simulations(get_difficulty_configs(configs["DIFFICULTY_DICT"]), n_games=10000,
+                                          seed=0):
+        print(key, key_stats.to_dict())
@@ -0,0 +1,89 @@
+import struct
+import numpy as np
+from application.core import GameCore
+from application.topology import RECTANGLE, TORUS
+
+# a header of a saved game: magic, version, flags, height, width, # of black holes, status, and a 128-bit seed
+HEADER = struct.Struct("<4sHHIIIB3x16s")
+MAGIC = b"SAPR"
+VERSION = 2
+# versions which can be loaded, files of version 1 have no bitmap of flags
+VERSIONS = (1, 2)
+
+# bits of the flags field
+HAS_SEED = 1
+BLACK_HOLES_PLACED = 2
+FIRST_CLICK_SAFE = 4
+WRAP = 8
+
+STATUSES = (GameCore.PLAYING, GameCore.WON, GameCore.LOST)
+
+
+def save_game(game, path):
+    """
+        The function saves a game to a compact binary file: a header followed by packed bitmaps of black holes, open
+        cells, and flagged cells
+    :param game: GameCore
+    :param path: str, a path of the file
+    :return:
+    """
+    flags = (HAS_SEED if game.seed is not None else 0) | \
+            (BLACK_HOLES_PLACED if game.black_holes_placed else 0) | \
+            (FIRST_CLICK_SAFE if game.first_click_safe else 0) | \
+            (WRAP if game.topology == TORUS else 0)
+    seed = game.seed if game.seed is not None else 0
+    if not 0 <= seed < 1 << 128:
+        raise ValueError(f"The seed {seed} does not fit into 128 bits")
+
+    header = HEADER.pack(MAGIC, VERSION, flags, game.height, game.width, game.n_black_holes,
+                         STATUSES.index(game.status), seed.to_bytes(16, "little"))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(np.packbits(game.board.black_holes).tobytes())
+        f.write(np.packbits(game.board.cell_open).tobytes())
+        f.write(np.packbits(game.cell_flagged).tobytes())
+
+
+def read_bitmap(f, path, n_cells):
+    """
+        The function reads a packed bitmap of the board
+    :param f: a file object opened at the bitmap
+    :param path: str, a path of the file
+    :param n_cells: int, a number of cells of the board
+    :return:
+        bitmap - np.array of boolean values
+    """
+    n_bytes = (n_cells + 7) // 8
+    packed = np.frombuffer(f.read(n_bytes), dtype=np.uint8)
+    if len(packed) != n_bytes:
+        raise ValueError(f"The file {path} is truncated")
+
+    return np.unpackbits(packed, count=n_cells).view(bool)
+
+
+def load_game(path, cls=GameCore):
+    """
+        The function loads a game saved by save_game, # of adjacent black holes is calculated on the first access.
+        Bitmaps take 1 bit per cell, e.g. 125 KB each for a 1000x1000 board, so they are read at once rather than
+        memory-mapped: the board keeps unpacked arrays anyway
+    :param path: str, a path of the file
+    :param cls: GameCore or its subclass to restore
+    :return:
+        game - an object of cls
+    """
+    with open(path, "rb") as f:
+        magic, version, flags, height, width, n_black_holes, status, seed = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version not in VERSIONS:
+            raise ValueError(f"The file {path} is not a saved game of versions {VERSIONS}")
+
+        n_cells = height * width
+        black_holes = read_bitmap(f, path, n_cells)
+        cell_open = read_bitmap(f, path, n_cells)
+        cell_flagged = read_bitmap(f, path, n_cells) if version >= 2 else None
+
+    return cls.restore(height=height, width=width, n_black_holes=n_black_holes,
+                       seed=int.from_bytes(seed, "little") if flags & HAS_SEED else None,
+                       first_click_safe=bool(flags & FIRST_CLICK_SAFE),
+                       black_holes=black_holes if flags & BLACK_HOLES_PLACED else None,
+                       cell_open=cell_open, status=STATUSES[status], cell_flagged=cell_flagged,
+                       topology=TORUS if flags & WRAP else RECTANGLE)
@@ -0,0 +1,220 @@
+from math import comb, lgamma
+import numpy as np
+
+
+class ProbabilityMap:
+    """
+        Chances of closed cells to be black holes given numbers of open cells. The frontier is split into independent
+        components which are enumerated separately, and results of components are cached between clicks, so only
+        components changed by the last click are enumerated again
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.cache = {}
+
+    def get_constraints(self):
+        """
+            This function builds constraints of the frontier: closed cells adjacent to an open cell have as many black
+            holes as the number of the open cell
+        :return:
+            constraints - a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        """
+        board = self.game.board
+        adjacent_black_holes = board.adjacent_black_holes
+        numbered = np.flatnonzero(board.cell_open & (adjacent_black_holes > 0))
+        closed, offsets = board.topology.get_adjacent_batch(numbered, mask=~board.cell_open)
+        closed, offsets = closed.tolist(), offsets.tolist()
+
+        constraints = set()
+        for i, n_black_holes in enumerate(adjacent_black_holes[numbered].tolist()):
+            cells = tuple(closed[offsets[i]:offsets[i + 1]])
+            if cells:
+                constraints.add((cells, n_black_holes))
+
+        return list(constraints)
+
+    @staticmethod
+    def get_components(constraints):
+        """
+            This function splits constraints into components which share no cells
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            components - a list of lists of constraints
+        """
+        cell_constraints = {}
+        for i, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                cell_constraints.setdefault(cell, []).append(i)
+
+        # searching connected constraints
+        components = []
+        visited = np.zeros(len(constraints), dtype=bool)
+        for i in range(len(constraints)):
+            if visited[i]:
+                continue
+            visited[i] = True
+            component, queue = [], [i]
+            while queue:
+                j = queue.pop()
+                component.append(constraints[j])
+                for cell in constraints[j][0]:
+                    for k in cell_constraints[cell]:
+                        if not visited[k]:
+                            visited[k] = True
+                            queue.append(k)
+            components.append(component)
+
+        return components
+
+    @staticmethod
+    def enumerate_component(constraints):
+        """
+            This function enumerates all placements of black holes in cells of a component, which satisfy its
+            constraints, and counts them by # of black holes. Cells of the same constraints are interchangeable, so
+            they are enumerated as a group by # of black holes in it
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            cells - np.array of flat cell indexes of the component
+            counts - np.array of shape (n_cells + 1,), relative # of placements with k black holes
+            cell_counts - np.array of shape (n_cells + 1, n_cells), relative # of placements with k black holes in
+            which a cell is a black hole
+        """
+        # grouping cells by their constraints
+        cell_constraints = {}
+        for i, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                cell_constraints.setdefault(cell, []).append(i)
+        groups = {}
+        for cell, indexes in cell_constraints.items():
+            groups.setdefault(tuple(indexes), []).append(cell)
+
+        # ordering groups by a breadth-first search over constraints, so constraints are checked early
+        constraint_groups = [[] for _ in constraints]
+        for indexes in groups:
+            for i in indexes:
+                constraint_groups[i].append(indexes)
+        order = [next(iter(groups))]
+        ordered = {order[0]}
+        for indexes in order:
+            for i in indexes:
+                for adjacent in constraint_groups[i]:
+                    if adjacent not in ordered:
+                        ordered.add(adjacent)
+                        order.append(adjacent)
+        sizes = [len(groups[indexes]) for indexes in order]
+        binomials = [[float(comb(size, value)) for value in range(size + 1)] for size in sizes]
+
+        # black holes which are still needed, and cells which are still free, per constraint
+        needed = [n_black_holes for _, n_black_holes in constraints]
+        free = [len(constraint_cells) for constraint_cells, _ in constraints]
+        n_groups = len(order)
+        n_cells = sum(sizes)
+        counts = [0.] * (n_cells + 1)
+        group_counts = [[0.] * n_groups for _ in range(n_cells + 1)]
+        values = [0] * n_groups
+
+        def assign(i, n_black_holes, weight):
+            if i == n_groups:
+                counts[n_black_holes] += weight
+                row = group_counts[n_black_holes]
+                for j in range(n_groups):
+                    if values[j]:
+                        row[j] += weight * values[j] / sizes[j]
+                return
+
+            indexes = order[i]
+            for value in range(sizes[i] + 1):
+                valid = True
+                for j in indexes:
+                    free[j] -= sizes[i]
+                    needed[j] -= value
+                    if needed[j] < 0 or needed[j] > free[j]:
+                        valid = False
+                if valid:
+                    values[i] = value
+                    assign(i + 1, n_black_holes + value, weight * binomials[i][value])
+                for j in indexes:
+                    free[j] += sizes[i]
+                    needed[j] += value
+            values[i] = 0
+
+        assign(0, 0, 1.)
+
+        # expanding groups to cells, scaling counts keeps products of many components in the range of floats
+        counts = np.array(counts)
+        scale = counts.max()
+        cells = np.array([cell for indexes in order for cell in groups[indexes]])
+        cell_groups = np.repeat(np.arange(n_groups), sizes)
+
+        return cells, counts / scale, np.array(group_counts)[:, cell_groups] / scale
+
+    def get_component(self, constraints):
+        """
+            This function returns enumerated placements of a component from the cache, or enumerates them
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            a tuple returned by enumerate_component
+        """
+        signature = frozenset(constraints)
+        if signature not in self.cache:
+            self.cache[signature] = self.enumerate_component(constraints)
+
+        return self.cache[signature]
+
+    def get_probabilities(self):
+        """
+            This function calculates chances of all closed cells to be black holes. Components are combined with
+            cells away from the frontier by weighting every total # of black holes in components with # of ways to
+            place the rest of black holes away from the frontier
+        :return:
+            probabilities - np.array of shape (height * width,) of floats, NaN for open cells
+        """
+        board = self.game.board
+        n_black_holes = self.game.n_black_holes
+        probabilities = np.full(board.n_cells, np.nan)
+        cell_closed = ~board.cell_open
+        if not self.game.black_holes_placed or not board.cell_open.any():
+            probabilities[cell_closed] = n_black_holes / max(int(np.count_nonzero(cell_closed)), 1)
+            return probabilities
+
+        # enumerating components, the cache keeps only components of the current frontier
+        signatures = [frozenset(component) for component in self.get_components(self.get_constraints())]
+        components = [self.get_component(list(signature)) for signature in signatures]
+        self.cache = {signature: self.cache[signature] for signature in signatures}
+
+        # cells away from the frontier
+        other = cell_closed.copy()
+        for cells, _, _ in components:
+            other[cells] = False
+        n_other = int(np.count_nonzero(other))
+
+        # relative # of ways to place the rest of black holes away from the frontier for every # in components
+        n_frontier_max = sum(len(cells) for cells, _, _ in components)
+        n_rest = n_black_holes - np.arange(n_frontier_max + 1)
+        possible = (n_rest >= 0) & (n_rest <= n_other)
+        log_weights = np.full(n_frontier_max + 1, -np.inf)
+        log_weights[possible] = [lgamma(n_other + 1) - lgamma(rest + 1) - lgamma(n_other - rest + 1)
+                                 for rest in n_rest[possible].tolist()]
+        weights = np.exp(log_weights - log_weights.max())
+
+        # combining components
+        total_counts = np.ones(1)
+        for _, counts, _ in components:
+            total_counts = np.convolve(total_counts, counts)
+        total = (total_counts * weights).sum()
+
+        if n_other:
+            probabilities[other] = (total_counts * weights * np.where(possible, n_rest, 0)).sum() / n_other / total
+
+        for i, (cells, counts, cell_counts) in enumerate(components):
+            other_counts = np.ones(1)
+            for j, (_, counts_j, _) in enumerate(components):
+                if j != i:
+                    other_counts = np.convolve(other_counts, counts_j)
+            # weights of every # of black holes in the component given all other components
+            component_weights = np.array([(other_counts * weights[k:k + len(other_counts)]).sum()
+                                          for k in range(len(counts))])
+            probabilities[cells] = component_weights @ cell_counts / total
+
+        return probabilities
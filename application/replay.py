@@ -0,0 +1,161 @@
+import struct
+import time
+import numpy as np
+from application.core import GameCore
+from application.topology import RECTANGLE, TORUS
+
+# a header of a replay log: magic, version, flags, height, width, # of black holes, and a 128-bit seed
+HEADER = struct.Struct("<4sHHIII16s")
+MAGIC = b"SAPL"
+VERSION = 1
+
+# bits of the flags field
+FIRST_CLICK_SAFE = 1
+WRAP = 2
+
+# actions of events
+REVEAL = 0
+FLAG = 1
+CHORD = 2
+
+# an event: a clicked cell, an action, # of newly opened cells, the state of the game after the event, and
+# milliseconds since the start of the game
+EVENT_DTYPE = np.dtype([("cell", "<u4"), ("action", "u1"), ("status", "u1"), ("n_opened", "<u4"),
+                        ("time_ms", "<u4")])
+
+STATUSES = (GameCore.PLAYING, GameCore.WON, GameCore.LOST)
+
+
+class ReplayRecorder:
+    """
+        An append-only log of events of a game, the game is replayed from its seed
+    """
+
+    def __init__(self, game, path):
+        if game.seed is None:
+            raise ValueError("Only games with a seed can be recorded")
+        if not 0 <= game.seed < 1 << 128:
+            raise ValueError(f"The seed {game.seed} does not fit into 128 bits")
+
+        self.path = path
+        self.start = time.monotonic()
+
+        # writing the header, events are appended after it
+        self.file = open(path, "wb")
+        flags = (FIRST_CLICK_SAFE if game.first_click_safe else 0) | (WRAP if game.topology == TORUS else 0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, flags, game.height, game.width, game.n_black_holes,
+                                    game.seed.to_bytes(16, "little")))
+        self.file.flush()
+
+    def record(self, cell, action, n_opened, status):
+        """
+            This function appends an event to the log
+        :param cell: a flat index of the cell
+        :param action: int, an action of the event
+        :param n_opened: int, # of newly opened cells
+        :param status: str, the state of the game after the event
+        :return:
+        """
+        event = np.array([(cell, action, STATUSES.index(status), n_opened,
+                           int((time.monotonic() - self.start) * 1000))], dtype=EVENT_DTYPE)
+        self.file.write(event.tobytes())
+        self.file.flush()
+
+    def close(self):
+        """
+            This function closes the log
+        :return:
+        """
+        self.file.close()
+
+
+def read_log(path):
+    """
+        The function reads a replay log
+    :param path: str, a path of the log
+    :return:
+        header - a dict of the game properties
+        events - np.array of EVENT_DTYPE
+    """
+    with open(path, "rb") as f:
+        magic, version, flags, height, width, n_black_holes, seed = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"The file {path} is not a replay log of version {VERSION}")
+        data = f.read()
+
+    # a partly written event at the end of the log is ignored
+    n_events = len(data) // EVENT_DTYPE.itemsize
+    events = np.frombuffer(data, dtype=EVENT_DTYPE, count=n_events)
+    header = {"height": height, "width": width, "n_black_holes": n_black_holes,
+              "seed": int.from_bytes(seed, "little"), "first_click_safe": bool(flags & FIRST_CLICK_SAFE),
+              "topology": TORUS if flags & WRAP else RECTANGLE}
+
+    return header, events
+
+
+def apply_event(game, cell, action):
+    """
+        The function applies an event to a game
+    :param game: GameCore
+    :param cell: a flat index of the cell
+    :param action: int, an action of the event
+    :return:
+        n_opened - # of newly opened cells
+    """
+    if action == REVEAL:
+        return len(game.reveal(cell))
+    if action == FLAG:
+        game.flag(cell)
+        return 0
+    if action == CHORD:
+        return len(game.chord(cell))
+
+    raise ValueError(f"Unknown action {action}")
+
+
+def replay(path, until=None):
+    """
+        The function replays a log headlessly at full speed
+    :param path: str, a path of the log
+    :param until: int, a number of events to replay, all events by default
+    :return:
+        game - GameCore after the events
+    """
+    header, events = read_log(path)
+    game = GameCore(**header)
+    for cell, action in zip(events["cell"][:until].tolist(), events["action"][:until].tolist()):
+        apply_event(game, cell, action)
+
+    return game
+
+
+def verify_log(path):
+    """
+        The function replays a log and checks that every event gives the recorded result
+    :param path: str, a path of the log
+    :return:
+        result - a dict with the path, whether the log is verified, # of events, and the index of the first
+        mismatching event or None
+    """
+    header, events = read_log(path)
+    game = GameCore(**header)
+
+    cells = events["cell"].tolist()
+    actions = events["action"].tolist()
+    statuses = events["status"].tolist()
+    n_opened = events["n_opened"].tolist()
+    for i in range(len(events)):
+        if apply_event(game, cells[i], actions[i]) != n_opened[i] or STATUSES.index(game.status) != statuses[i]:
+            return {"path": path, "ok": False, "n_events": len(events), "first_mismatch": i}
+
+    return {"path": path, "ok": True, "n_events": len(events), "first_mismatch": None}
+
+
+def verify_logs(paths):
+    """
+        The function verifies many logs
+    :param paths: an iterable of paths of logs
+    :return:
+        results - a list of dicts returned by verify_log
+    """
+    return [verify_log(path) for path in paths]
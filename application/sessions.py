@@ -0,0 +1,340 @@
+from collections import OrderedDict
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+import numpy as np
+from application.core import GameCore
+from application.persistence import load_game, save_game
+from application.topology import RECTANGLE
+
+# seeds are kept in 128 bits by saved games and replay logs
+MAX_SEED = 1 << 128
+
+
+class Session:
+    """
+        A game of one player, the game is None while the session is evicted to disk
+    """
+    __slots__ = ("session_id", "game", "path", "last_used", "n_clicks")
+
+    def __init__(self, session_id, game):
+        self.session_id = session_id
+        self.game = game
+        self.path = None
+        self.last_used = time.monotonic()
+        self.n_clicks = 0
+
+
+class SessionManager:
+    """
+        Many headless games of one process. Every session owns its game, so no state is shared between players
+        except the cached indexes of adjacent cells. Sessions which are idle, or the least recently used ones above
+        the limit, are saved to disk and loaded again on the next request. A session which fails to be saved stays in
+        memory until the next attempt. Requests and responses are dicts of JSON types, so the same calls serve a
+        websocket and an in-process client
+    """
+
+    def __init__(self, directory=None, max_active=1000, idle_s=300.0, max_cells=1000000, first_click_safe=True,
+                 topology=RECTANGLE):
+        self.directory = directory
+        self.max_active = max_active
+        self.idle_s = idle_s
+        self.max_cells = max_cells
+        self.first_click_safe = first_click_safe
+        self.topology = topology
+
+        # all sessions, and sessions whose games are in memory from the least to the most recently used
+        self.sessions = {}
+        self.active = OrderedDict()
+        self.lock = threading.Lock()
+        self.n_evictions = 0
+        self.n_eviction_errors = 0
+        self.n_loads = 0
+
+        self.actions = {"create": self.create, "click": self.click, "flag": self.flag, "status": self.status,
+                        "close": self.close, "stats": self.stats}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+            This function creates the manager from the settings
+        :param settings: Settings
+        :return:
+            session_manager - SessionManager
+        """
+        sessions = settings.sessions or {}
+        board = settings.board or {}
+
+        return cls(directory=sessions.get("DIRECTORY"), max_active=sessions.get("MAX_ACTIVE", 1000),
+                   idle_s=sessions.get("IDLE_S", 300.0), max_cells=sessions.get("MAX_CELLS", 1000000),
+                   first_click_safe=bool(settings.first_click_safe),
+                   topology=board.get("TOPOLOGY", RECTANGLE))
+
+    def handle(self, request):
+        """
+            This function handles a request, errors are returned in the response instead of being raised
+        :param request: dict with "action" and arguments of the action, e.g. {"action": "click", "session_id": ...,
+            "cell": 0}
+        :return:
+            response - dict
+        """
+        request = dict(request)
+        action = self.actions.get(request.pop("action", None))
+        if action is None:
+            return {"error": f"Unknown action, expected one of {list(self.actions)}"}
+
+        try:
+            with self.lock:
+                response = action(**request)
+                self.evict_idle()
+        except (KeyError, TypeError, ValueError, MemoryError) as error:
+            return {"error": str(error.args[0]) if error.args else repr(error)}
+        except OSError as error:
+            return {"error": str(error)}
+
+        return response
+
+    def handle_json(self, message):
+        """
+            This function handles a request of a websocket
+        :param message: str, a request as JSON
+        :return:
+            response - str, a response as JSON
+        """
+        try:
+            request = json.loads(message)
+        except ValueError as error:
+            return json.dumps({"error": str(error)})
+
+        return json.dumps(self.handle(request) if isinstance(request, dict) else {"error": "A request is an object"})
+
+    def create(self, height, width, n_black_holes, seed=None):
+        """
+            This function starts a new game in a new session
+        :param height: int, a height of the board
+        :param width: int, a width of the board
+        :param n_black_holes: int, a number of black holes
+        :param seed: int from 0 to 2 ** 128 - 1, or None, a seed of the game
+        :return:
+            response - dict with the id of the session and its state
+        """
+        # checking the arguments before anything is allocated, boards above the limit are refused
+        height = self.get_int("height", height, 1, self.max_cells + 1)
+        width = self.get_int("width", width, 1, self.max_cells + 1)
+        if height * width > self.max_cells:
+            raise ValueError(f"A board of {height}x{width} is larger than the limit of {self.max_cells} cells")
+        n_black_holes = self.get_int("number of black holes", n_black_holes, 0, height * width + 1)
+        if seed is not None:
+            seed = self.get_int("seed", seed, 0, MAX_SEED)
+        if not 0 <= n_black_holes < height * width:
+            raise ValueError(f"{n_black_holes} black holes do not fit into a board of {height}x{width}")
+
+        game = GameCore(height=height, width=width, n_black_holes=n_black_holes, seed=seed,
+                        first_click_safe=self.first_click_safe, topology=self.topology)
+        session_id = secrets.token_hex(8)
+        session = self.sessions[session_id] = Session(session_id, game)
+        self.active[session_id] = session
+
+        return self.get_state(session)
+
+    def get_session(self, session_id):
+        """
+            This function returns a session with its game in memory, an evicted game is loaded from disk. If the
+            saved game is missing the session is closed, other errors of the disk leave it evicted, so the load is
+            tried again on the next request
+        :param session_id: str
+        :return:
+            session - Session
+        """
+        if session_id not in self.sessions:
+            raise KeyError(f"Unknown session {session_id}")
+        session = self.sessions[session_id]
+
+        if session.game is None:
+            try:
+                game = load_game(session.path)
+            except FileNotFoundError:
+                self.sessions.pop(session_id)
+                raise KeyError(f"The saved game of the session {session_id} is missing, the session is closed")
+
+            # the session is in memory from now on, a saved file which can not be removed is only left on disk
+            path = session.path
+            session.game = game
+            session.path = None
+            self.n_loads += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        session.last_used = time.monotonic()
+        self.active[session_id] = session
+        self.active.move_to_end(session_id)
+
+        return session
+
+    @staticmethod
+    def get_int(name, value, low, high):
+        """
+            This function checks an integer argument of a request
+        :param name: str, a name of the argument
+        :param value: a value of the argument
+        :param low: int, the smallest allowed value
+        :param high: int, the first value above the allowed ones
+        :return:
+            value - int
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or not low <= value < high:
+            raise ValueError(f"The {name} {value!r} is not an integer from {low} to {high - 1}")
+
+        return int(value)
+
+    def get_cell(self, game, cell):
+        """
+            This function checks a flat index of a cell of a request
+        :param game: GameCore
+        :param cell: int, a flat cell index
+        :return:
+            cell - int
+        """
+        return self.get_int("cell", cell, 0, game.board.n_cells)
+
+    def click(self, session_id, cell):
+        """
+            This function opens a closed cell, or opens adjacent cells of an open cell like a chord
+        :param session_id: str
+        :param cell: int, a flat cell index
+        :return:
+            response - dict with newly open cells, and black holes if the game is lost
+        """
+        session = self.get_session(session_id)
+        game = session.game
+        cell = self.get_cell(game, cell)
+        new_open_cells = game.chord(cell) if game.board.cell_open[cell] else game.reveal(cell)
+        session.n_clicks += 1
+
+        response = self.get_state(session)
+        response["opened"] = new_open_cells.tolist()
+        if game.status == GameCore.LOST:
+            response["black_holes"] = np.flatnonzero(game.board.black_holes).tolist()
+
+        return response
+
+    def flag(self, session_id, cell):
+        """
+            This function flags a closed cell or removes its flag
+        :param session_id: str
+        :param cell: int, a flat cell index
+        :return:
+            response - dict with whether the cell is flagged now
+        """
+        session = self.get_session(session_id)
+        cell = self.get_cell(session.game, cell)
+        response = self.get_state(session)
+        response["flagged"] = session.game.flag(cell)
+
+        return response
+
+    def status(self, session_id):
+        """
+            This function returns the state of a session
+        :param session_id: str
+        :return:
+            response - dict
+        """
+        return self.get_state(self.get_session(session_id))
+
+    def close(self, session_id):
+        """
+            This function ends a session and deletes its saved game
+        :param session_id: str
+        :return:
+            response - dict
+        """
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise KeyError(f"Unknown session {session_id}")
+
+        self.active.pop(session_id, None)
+        if session.path is not None:
+            os.remove(session.path)
+
+        return {"session_id": session_id, "closed": True}
+
+    def stats(self):
+        """
+            This function returns # of sessions, and memory of games in memory
+        :return:
+            response - dict
+        """
+        return {"n_sessions": len(self.sessions), "n_active": len(self.active), "nbytes": self.nbytes,
+                "n_evictions": self.n_evictions, "n_eviction_errors": self.n_eviction_errors, "n_loads": self.n_loads}
+
+    @staticmethod
+    def get_state(session):
+        """
+            This function describes a session with its game in memory
+        :param session: Session
+        :return:
+            state - dict
+        """
+        game = session.game
+
+        return {"session_id": session.session_id, "status": game.status, "height": game.height, "width": game.width,
+                "n_black_holes": game.n_black_holes, "n_open_cells": game.n_open_cells,
+                "n_cells_to_open": game.n_cells_to_open, "n_clicks": session.n_clicks, "nbytes": game.nbytes}
+
+    def evict(self, session):
+        """
+            This function saves the game of a session to disk and drops it from memory, if saving fails the session
+            stays in memory, and a partly written file is removed
+        :param session: Session
+        :return:
+        """
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="sessions-")
+
+        path = os.path.join(self.directory, f"{session.session_id}.bin")
+        try:
+            save_game(session.game, path)
+        except OSError:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        session.path = path
+        session.game = None
+        self.active.pop(session.session_id)
+        self.n_evictions += 1
+
+    def evict_idle(self, now=None):
+        """
+            This function evicts sessions which are idle for longer than the limit, and the least recently used
+            sessions above the limit of sessions in memory. Only the oldest sessions are checked. Errors of the disk
+            are counted and not raised, so they do not fail the request which triggered the eviction, and evictions
+            are tried again on the next request
+        :param now: float or None, the current time of time.monotonic
+        :return:
+        """
+        now = now if now is not None else time.monotonic()
+        while self.active:
+            session = next(iter(self.active.values()))
+            if len(self.active) <= self.max_active and now - session.last_used < self.idle_s:
+                return
+            try:
+                self.evict(session)
+            except OSError:
+                self.n_eviction_errors += 1
+                return
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of states of games in memory
+        :return:
+            int
+        """
+        return sum(session.game.nbytes for session in self.active.values())
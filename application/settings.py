@@ -11,8 +11,26 @@ class Settings:
         self.borders = configs.get("BORDER", None)
         self.handle_color = configs.get("HANDLE_COLOR", None)
 
+        # random numbers
+        self.seed = configs.get("SEED", None)
+        self.first_click_safe = configs.get("FIRST_CLICK_SAFE", None)
+
+        # a shape of boards: a rectangle or a torus, and a width relative to the matrix size
+        self.board = configs.get("BOARD", None)
+
         # cells
         self.cell = configs.get("CELL", None)
+        self.button_pool = configs.get("BUTTON_POOL", None)
+        self.renderer = configs.get("RENDERER", None)
+        self.board_pool = configs.get("BOARD_POOL", None)
+
+        # headless sessions of many players
+        self.sessions = configs.get("SESSIONS", None)
+
+        # instrumentation, replays, and events
+        self.instrumentation = configs.get("INSTRUMENTATION", None)
+        self.replay = configs.get("REPLAY", None)
+        self.events = configs.get("EVENTS", None)
 
         # difficulty levels
         self.difficulty_dict = configs.get("DIFFICULTY_DICT", None)
@@ -24,3 +42,4 @@ class Settings:
         self.validation = configs.get("VALIDATION", None)
         self.progress_bar = configs.get("PROGRESS_BAR", None)
         self.start_button = configs.get("START_BUTTON", None)
+        self.flag_button = configs.get("FLAG_BUTTON", None)
@@ -0,0 +1,365 @@
+import time
+import numpy as np
+from application.core import GameCore
+from application.parallel import get_seed, map_work_units
+from application.topology import RECTANGLE
+
+
+class Solver:
+    """
+        A solver which plays a game only with information visible to a player: it opens cells and marks black holes
+        which follow from numbers of open cells, and guesses only when nothing follows
+    """
+    # a relative tolerance of the gaussian elimination
+    EPS = 1e-9
+
+    def __init__(self, game, max_global_unknown=64):
+        self.game = game
+        self.max_global_unknown = max_global_unknown
+        self.height = game.height
+        self.width = game.width
+        # counts of adjacent cells follow the topology of the board, e.g. wrap around on a torus
+        self.count_adjacent = game.board.count_adjacent
+
+        # views of the board as matrices, numbers are read only for open cells
+        self.cell_open = game.board.cell_open.reshape(self.height, self.width)
+        self.black_holes_found = np.zeros((self.height, self.width), dtype=bool)
+        self.n_guesses = 0
+        self.n_steps = 0
+
+    def get_numbers(self):
+        """
+            This function returns # of adjacent black holes of open cells
+        :return:
+            numbers - np.array of shape (height, width), zeros for closed cells
+        """
+        numbers = self.game.board.adjacent_black_holes.reshape(self.height, self.width)
+
+        return np.where(self.cell_open, numbers, 0)
+
+    def get_adjacent_mask(self, mask):
+        """
+            This function marks cells which have at least one adjacent cell of the mask
+        :param mask: np.array of shape (height, width) of boolean values
+        :return:
+            adjacent_mask - np.array of shape (height, width) of boolean values
+        """
+        return self.count_adjacent(mask) > 0
+
+    def find_single_cell(self):
+        """
+            This function applies single-cell deductions to all open cells at once: if an open cell has as many black
+            holes found around it as its number, the rest of its closed neighbours are safe, and if it has as many
+            closed neighbours as black holes left, they are all black holes
+        :return:
+            safe - np.array of shape (height, width) of safe cells
+            black_holes - np.array of shape (height, width) of black holes
+        """
+        unknown = ~self.cell_open & ~self.black_holes_found
+        n_left = self.get_numbers() - self.count_adjacent(self.black_holes_found)
+        n_unknown = self.count_adjacent(unknown)
+        active = self.cell_open & (n_unknown > 0)
+
+        safe = self.get_adjacent_mask(active & (n_left == 0)) & unknown
+        black_holes = self.get_adjacent_mask(active & (n_left == n_unknown)) & unknown
+
+        return safe, black_holes
+
+    def get_constraints(self):
+        """
+            This function builds constraints of the frontier: closed cells adjacent to an open cell have as many black
+            holes as the number of the open cell minus black holes found around it
+        :return:
+            constraints - a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        """
+        unknown = (~self.cell_open & ~self.black_holes_found).reshape(-1)
+        n_left = (self.get_numbers() - self.count_adjacent(self.black_holes_found)).reshape(-1)
+        active = np.flatnonzero(self.cell_open & self.get_adjacent_mask(~self.cell_open & ~self.black_holes_found))
+        unknown_adjacent, offsets = self.game.board.topology.get_adjacent_batch(active, mask=unknown)
+        unknown_adjacent, offsets = unknown_adjacent.tolist(), offsets.tolist()
+
+        constraints = set()
+        for i, n_black_holes in enumerate(n_left[active].tolist()):
+            constraints.add((tuple(unknown_adjacent[offsets[i]:offsets[i + 1]]), n_black_holes))
+
+        return list(constraints)
+
+    @staticmethod
+    def find_subsets(constraints):
+        """
+            This function compares pairs of constraints: if cells of one constraint are a subset of cells of another,
+            the difference of the cells has the difference of black holes
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            safe - a set of flat indexes of safe cells
+            black_holes - a set of flat indexes of black holes
+        """
+        safe, black_holes = set(), set()
+
+        # only constraints which share a cell can be subsets of each other
+        cell_constraints = {}
+        for i, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                cell_constraints.setdefault(cell, []).append(i)
+
+        for i, (cells, n_black_holes) in enumerate(constraints):
+            cells_set = set(cells)
+            candidates = set(j for cell in cells for j in cell_constraints[cell] if j != i)
+            for j in candidates:
+                other_cells, other_n_black_holes = constraints[j]
+                if len(other_cells) <= len(cells) or not cells_set.issubset(other_cells):
+                    continue
+                difference = set(other_cells) - cells_set
+                n_difference = other_n_black_holes - n_black_holes
+                if n_difference == 0:
+                    safe.update(difference)
+                elif n_difference == len(difference):
+                    black_holes.update(difference)
+
+        return safe, black_holes
+
+    def find_linear(self, constraints):
+        """
+            This function reduces constraints of the frontier to the row echelon form, and checks bounds of every
+            row: if the right side equals the sum of positive coefficients, cells with positive coefficients are black
+            holes and cells with negative ones are safe, and vice versa. When few cells are closed, the total number
+            of black holes left is added as one more constraint
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            safe - a set of flat indexes of safe cells
+            black_holes - a set of flat indexes of black holes
+        """
+        unknown = np.flatnonzero(~self.cell_open & ~self.black_holes_found)
+        rows = list(constraints)
+        if len(unknown) <= self.max_global_unknown:
+            rows.append((tuple(unknown.tolist()), self.game.n_black_holes - int(self.black_holes_found.sum())))
+
+        # building the matrix of constraints over cells in them
+        cells = sorted(set(cell for row_cells, _ in rows for cell in row_cells))
+        columns = {cell: i for i, cell in enumerate(cells)}
+        matrix = np.zeros((len(rows), len(cells) + 1))
+        for i, (row_cells, n_black_holes) in enumerate(rows):
+            matrix[i, [columns[cell] for cell in row_cells]] = 1
+            matrix[i, -1] = n_black_holes
+
+        # the gaussian elimination with partial pivoting
+        pivot_row = 0
+        for column in range(len(cells)):
+            if pivot_row == len(rows):
+                break
+            pivot = pivot_row + int(np.argmax(np.abs(matrix[pivot_row:, column])))
+            if abs(matrix[pivot, column]) < self.EPS:
+                continue
+            matrix[[pivot_row, pivot]] = matrix[[pivot, pivot_row]]
+            matrix[pivot_row] /= matrix[pivot_row, column]
+            others = np.arange(len(rows)) != pivot_row
+            matrix[others] -= np.outer(matrix[others, column], matrix[pivot_row])
+            pivot_row += 1
+
+        # checking bounds of every row
+        safe, black_holes = set(), set()
+        cells = np.array(cells)
+        for row in matrix[:pivot_row]:
+            coefficients, right_side = row[:-1], row[-1]
+            positive = coefficients > self.EPS
+            negative = coefficients < -self.EPS
+            if abs(right_side - coefficients[positive].sum()) < self.EPS:
+                black_holes.update(cells[positive].tolist())
+                safe.update(cells[negative].tolist())
+            elif abs(right_side - coefficients[negative].sum()) < self.EPS:
+                black_holes.update(cells[negative].tolist())
+                safe.update(cells[positive].tolist())
+
+        return safe, black_holes
+
+    def guess(self, constraints):
+        """
+            This function chooses a closed cell with the lowest estimated chance to be a black hole
+        :param constraints: a list of tuples (a tuple of flat cell indexes, # of black holes among them)
+        :return:
+            cell - a flat cell index
+        """
+        unknown = (~self.cell_open & ~self.black_holes_found).reshape(-1)
+        n_left = self.game.n_black_holes - int(self.black_holes_found.sum())
+
+        # cells away from the frontier have the average density, frontier cells have their worst constraint
+        chances = np.where(unknown, n_left / max(int(unknown.sum()), 1), np.inf)
+        frontier_chances = np.zeros_like(chances)
+        for cells, n_black_holes in constraints:
+            cells = list(cells)
+            frontier_chances[cells] = np.maximum(frontier_chances[cells], n_black_holes / len(cells))
+        frontier = np.zeros_like(unknown)
+        frontier[[cell for cells, _ in constraints for cell in cells]] = True
+        chances[frontier] = frontier_chances[frontier]
+
+        return int(np.argmin(chances))
+
+    def open_cells(self, cells):
+        """
+            This function opens cells in the game
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        for cell in cells:
+            if self.game.status != GameCore.PLAYING:
+                break
+            self.game.reveal(int(cell))
+
+    def step(self):
+        """
+            This function makes one step: opens safe cells and marks black holes which follow from open cells,
+            trying the cheapest deductions first, or guesses
+        :return:
+        """
+        self.n_steps += 1
+
+        safe, black_holes = self.find_single_cell()
+        if safe.any() or black_holes.any():
+            self.black_holes_found |= black_holes
+            self.open_cells(np.flatnonzero(safe))
+            return
+
+        constraints = self.get_constraints()
+        for find in (self.find_subsets, self.find_linear):
+            safe, black_holes = find(constraints)
+            if safe or black_holes:
+                self.black_holes_found.flat[list(black_holes)] = True
+                self.open_cells(sorted(safe))
+                return
+
+        self.n_guesses += 1
+        self.open_cells([self.guess(constraints)])
+
+    def solve(self, start_cell=None):
+        """
+            This function plays the game until it is over
+        :param start_cell: a flat index of the first cell to open, the center of the board by default. The first
+            click is not a guess if the game places black holes on the first click
+        :return:
+            result - a dict with
+                won - whether the game is won
+                no_guess - whether the game is won without guessing
+                n_guesses - # of guesses
+                n_steps - # of steps
+                time_s - time to solve in seconds
+        """
+        start = time.perf_counter()
+
+        if not self.cell_open.any():
+            if start_cell is None:
+                start_cell = (self.height // 2) * self.width + self.width // 2
+            if not self.game.first_click_safe:
+                self.n_guesses += 1
+            self.open_cells([start_cell])
+
+        while self.game.status == GameCore.PLAYING:
+            self.step()
+
+        won = self.game.status == GameCore.WON
+
+        return {"won": won,
+                "no_guess": won and self.n_guesses == 0,
+                "n_guesses": self.n_guesses,
+                "n_steps": self.n_steps,
+                "time_s": time.perf_counter() - start}
+
+
+def create_solver_work_units(n_boards, height, width, n_black_holes, chunk_size, seed=None, topology=RECTANGLE):
+    """
+        The function splits boards into chunks, every board gets its own child of the root seed sequence, so the
+        boards do not depend on the number of workers
+    :param n_boards: int, a number of boards
+    :param height: int, a height of a board
+    :param width: int, a width of a board
+    :param n_black_holes: int, a number of black holes on a board
+    :param chunk_size: int, a maximum number of boards in a chunk
+    :param seed: int or None, the root seed
+    :param topology: str, RECTANGLE or TORUS
+    :return:
+        work_units - a list of tuples (height, width, n_black_holes, topology, a list of seed sequences)
+    """
+    seed_sequences = np.random.SeedSequence(seed).spawn(n_boards)
+
+    return [(height, width, n_black_holes, topology, seed_sequences[start:start + chunk_size])
+            for start in range(0, n_boards, chunk_size)]
+
+
+def solve_chunk(work_unit, stop_on_no_guess=False):
+    """
+        The function solves a chunk of first click safe boards in a worker process
+    :param work_unit: a tuple (height, width, n_black_holes, topology, a list of seed sequences)
+    :param stop_on_no_guess: bool, whether to stop after the first board which is solved without guessing
+    :return:
+        results - a list of dicts returned by Solver.solve with the seed of every board
+    """
+    height, width, n_black_holes, topology, seed_sequences = work_unit
+    results = []
+    for seed_sequence in seed_sequences:
+        board_seed = get_seed(seed_sequence)
+        game = GameCore(height=height, width=width, n_black_holes=n_black_holes, seed=board_seed,
+                        first_click_safe=True, topology=topology)
+        result = Solver(game).solve()
+        result["seed"] = board_seed
+        results.append(result)
+        if stop_on_no_guess and result["no_guess"]:
+            break
+
+    return results
+
+
+def find_no_guess_chunk(work_unit):
+    """
+        The function solves a chunk of boards until one of them is solved without guessing
+    :param work_unit: a tuple (height, width, n_black_holes, topology, a list of seed sequences)
+    :return:
+        results - a list of dicts returned by Solver.solve with the seed of every board
+    """
+    return solve_chunk(work_unit, stop_on_no_guess=True)
+
+
+def classify_boards(n_boards, height, width, n_black_holes, seed=None, topology=RECTANGLE, chunk_size=500,
+                    n_workers=None):
+    """
+        The function solves many first click safe boards in a process pool, and counts boards which are solved
+        without guessing
+    :param n_boards: int, a number of boards
+    :param height: int, a height of a board
+    :param width: int, a width of a board
+    :param n_black_holes: int, a number of black holes on a board
+    :param seed: int or None, the root seed, the same seed gives the same boards for any number of workers
+    :param topology: str, RECTANGLE or TORUS
+    :param chunk_size: int, a maximum number of boards in a chunk
+    :param n_workers: int, a number of worker processes, all cores are used by default
+    :return:
+        results - a list of dicts returned by Solver.solve with the seed of every board
+    """
+    work_units = create_solver_work_units(n_boards, height, width, n_black_holes, chunk_size, seed=seed,
+                                          topology=topology)
+
+    return [result for results in map_work_units(solve_chunk, work_units, n_workers=n_workers) for result in results]
+
+
+def generate_no_guess_game(height, width, n_black_holes, seed=None, max_attempts=1000, topology=RECTANGLE,
+                           chunk_size=16, n_workers=None):
+    """
+        The function generates a first click safe game which the solver wins without guessing after a click in the
+        center of the board. Chunks of boards are tried in a process pool, and the first board in the order of
+        attempts is returned, so the result does not depend on the number of workers
+    :param height: int, a height of a board
+    :param width: int, a width of a board
+    :param n_black_holes: int, a number of black holes on a board
+    :param seed: int or None, the root seed
+    :param max_attempts: int, a maximum number of boards to try
+    :param topology: str, RECTANGLE or TORUS
+    :param chunk_size: int, a maximum number of boards in a chunk
+    :param n_workers: int, a number of worker processes, all cores are used by default
+    :return:
+        seed - int, a seed of a new game which places the same black holes after a click in the center
+    """
+    work_units = create_solver_work_units(max_attempts, height, width, n_black_holes, chunk_size, seed=seed,
+                                          topology=topology)
+    for results in map_work_units(find_no_guess_chunk, work_units, n_workers=n_workers):
+        if results[-1]["no_guess"]:
+            return results[-1]["seed"]
+
+    raise RuntimeError(f"No board without guessing was found in {max_attempts} attempts")
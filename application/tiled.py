@@ -0,0 +1,310 @@
+from collections import OrderedDict, deque
+import numpy as np
+from application.board import Board
+from application.core import GameCore
+from application.topology import ADJACENT_OFFSETS
+
+
+def encode_coordinate(coordinate):
+    """
+        The function maps an integer coordinate to a non-negative one, as a seed sequence takes only non-negative
+        numbers: 0, -1, 1, -2, 2, ... become 0, 1, 2, 3, 4, ...
+    :param coordinate: int
+    :return:
+        int
+    """
+    return 2 * coordinate if coordinate >= 0 else -2 * coordinate - 1
+
+
+class Chunk:
+    """
+        A square of cells of a tiled board. A chunk without open cells is clean: it is fully defined by the seed and
+        can be dropped and generated again
+    """
+
+    def __init__(self, black_holes):
+        self.black_holes = black_holes
+        self.cell_open = np.zeros_like(black_holes)
+        self.adjacent_black_holes = None
+        self.n_open_cells = 0
+
+    @property
+    def clean(self):
+        """
+            The property returns whether the chunk has no state apart from its seed
+        :return:
+            bool
+        """
+        return self.n_open_cells == 0
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of arrays of the chunk
+        :return:
+            int
+        """
+        arrays = (self.black_holes, self.cell_open, self.adjacent_black_holes)
+
+        return sum(array.nbytes for array in arrays if array is not None)
+
+
+class TiledBoard:
+    """
+        An unbounded board of square chunks. Black holes of a chunk are generated from the seed and the coordinates
+        of the chunk, so chunks are created only when a click, a flood fill, or a view reaches them, and the least
+        recently used clean chunks are dropped to keep at most max_chunks in memory. Cells are addressed by a row
+        and a column which may be negative, cells around (0, 0) have no black holes so the first click is safe
+    """
+
+    def __init__(self, seed, density=0.15, chunk_size=32, max_chunks=1024, max_flood_cells=100000):
+        self.seed = seed
+        self.density = density
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.max_flood_cells = max_flood_cells
+        self.status = GameCore.PLAYING
+        self.n_open_cells = 0
+
+        # chunks ordered from the least recently used
+        self.chunks = OrderedDict()
+        # open cells with zero adjacent black holes whose adjacent cells are not open yet, a flood fill stopped by
+        # max_flood_cells continues from them
+        self.flood_queue = deque()
+
+    def generate_black_holes(self, chunk_row, chunk_column):
+        """
+            This function generates black holes of a chunk from the seed and the coordinates of the chunk
+        :param chunk_row: int, a row of the chunk
+        :param chunk_column: int, a column of the chunk
+        :return:
+            black_holes - np.array of shape (chunk_size, chunk_size) of black hole flags
+        """
+        seed_sequence = np.random.SeedSequence([self.seed, encode_coordinate(chunk_row),
+                                                encode_coordinate(chunk_column)])
+        black_holes = np.random.default_rng(seed_sequence).random((self.chunk_size, self.chunk_size)) < self.density
+
+        # clearing cells around (0, 0)
+        rows = chunk_row * self.chunk_size + np.arange(self.chunk_size)
+        columns = chunk_column * self.chunk_size + np.arange(self.chunk_size)
+        black_holes[np.ix_(np.abs(rows) <= 1, np.abs(columns) <= 1)] = False
+
+        return black_holes
+
+    def get_black_holes(self, chunk_row, chunk_column):
+        """
+            This function returns black holes of a chunk without creating the chunk
+        :param chunk_row: int, a row of the chunk
+        :param chunk_column: int, a column of the chunk
+        :return:
+            black_holes - np.array of shape (chunk_size, chunk_size) of black hole flags
+        """
+        chunk = self.chunks.get((chunk_row, chunk_column))
+        if chunk is not None:
+            return chunk.black_holes
+
+        return self.generate_black_holes(chunk_row, chunk_column)
+
+    def get_chunk(self, chunk_row, chunk_column):
+        """
+            This function returns a chunk, creating it on the first access, and drops the least recently used clean
+            chunks if there are too many chunks
+        :param chunk_row: int, a row of the chunk
+        :param chunk_column: int, a column of the chunk
+        :return:
+            chunk - Chunk
+        """
+        key = (chunk_row, chunk_column)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        # making room before the new chunk is added, so the chunk which is returned is never dropped
+        self.evict(self.max_chunks - 1)
+        chunk = Chunk(self.generate_black_holes(chunk_row, chunk_column))
+        self.chunks[key] = chunk
+
+        return chunk
+
+    def evict(self, max_chunks=None):
+        """
+            This function drops the least recently used clean chunks while there are more chunks than the limit,
+            chunks with open cells are kept
+        :param max_chunks: int or None, a limit of chunks, max_chunks by default
+        :return:
+        """
+        max_chunks = max_chunks if max_chunks is not None else self.max_chunks
+        n_extra = len(self.chunks) - max_chunks
+        if n_extra <= 0:
+            return
+
+        for key in [key for key, chunk in self.chunks.items() if chunk.clean][:n_extra]:
+            del self.chunks[key]
+
+    def get_adjacent_black_holes(self, chunk_row, chunk_column):
+        """
+            This function returns # of adjacent black holes of cells of a chunk, counting black holes of the border
+            cells of adjacent chunks
+        :param chunk_row: int, a row of the chunk
+        :param chunk_column: int, a column of the chunk
+        :return:
+            adjacent_black_holes - np.array of shape (chunk_size, chunk_size)
+        """
+        chunk = self.get_chunk(chunk_row, chunk_column)
+        if chunk.adjacent_black_holes is None:
+            # black holes of the chunk and of adjacent chunks, adjacent chunks are not created
+            size = self.chunk_size
+            black_holes = np.block([[chunk.black_holes if i == j == 0 else
+                                     self.get_black_holes(chunk_row + i, chunk_column + j) for j in (-1, 0, 1)]
+                                    for i in (-1, 0, 1)])
+            chunk.adjacent_black_holes = Board.count_adjacent_black_holes(black_holes)[size:2 * size, size:2 * size]
+
+        return chunk.adjacent_black_holes
+
+    def locate(self, row, column):
+        """
+            This function finds a chunk of a cell and the position of the cell in it
+        :param row: int, a row of the cell
+        :param column: int, a column of the cell
+        :return:
+            chunk_row, chunk_column, local_row, local_column - ints
+        """
+        chunk_row, local_row = divmod(row, self.chunk_size)
+        chunk_column, local_column = divmod(column, self.chunk_size)
+
+        return chunk_row, chunk_column, local_row, local_column
+
+    def reveal(self, row, column):
+        """
+            This function handles a click on a cell: a black hole ends the game, a cell with zero adjacent black
+            holes opens its area across chunks, at most max_flood_cells cells per click. The rest of a larger area
+            is opened by continue_flood
+        :param row: int, a row of the cell
+        :param column: int, a column of the cell
+        :return:
+            new_open_cells - a list of tuples (row, column) of newly open cells
+        """
+        chunk_row, chunk_column, local_row, local_column = self.locate(row, column)
+        chunk = self.get_chunk(chunk_row, chunk_column)
+        if self.status != GameCore.PLAYING or chunk.cell_open[local_row, local_column]:
+            return []
+
+        if chunk.black_holes[local_row, local_column]:
+            self.status = GameCore.LOST
+            return []
+
+        new_open_cells = [(row, column)]
+        self.open_cell(chunk, local_row, local_column)
+        if self.get_adjacent_black_holes(chunk_row, chunk_column)[local_row, local_column] == 0:
+            new_open_cells.extend(self.open_area(row, column))
+
+        return new_open_cells
+
+    def open_cell(self, chunk, local_row, local_column):
+        """
+            This function opens a cell of a chunk
+        :param chunk: Chunk
+        :param local_row: int, a row of the cell in the chunk
+        :param local_column: int, a column of the cell in the chunk
+        :return:
+        """
+        chunk.cell_open[local_row, local_column] = True
+        chunk.n_open_cells += 1
+        self.n_open_cells += 1
+
+    def open_area(self, row, column):
+        """
+            This function opens adjacent cells of an open cell with zero adjacent black holes: the flood fill walks
+            a queue of cells with zero adjacent black holes across chunks, and stops after max_flood_cells cells
+        :param row: int, a row of the cell
+        :param column: int, a column of the cell
+        :return:
+            new_open_cells - a list of tuples (row, column) of newly open cells
+        """
+        self.flood_queue.append((row, column))
+
+        return self.continue_flood()
+
+    @property
+    def flood_pending(self):
+        """
+            The property returns whether a flood fill was stopped by max_flood_cells and has cells left to open
+        :return:
+            bool
+        """
+        return bool(self.flood_queue)
+
+    def continue_flood(self):
+        """
+            This function continues flood fills stopped by max_flood_cells, opening at most max_flood_cells cells,
+            e.g. once per frame until flood_pending is False
+        :return:
+            new_open_cells - a list of tuples (row, column) of newly open cells
+        """
+        new_open_cells = []
+        adjacent_open_cells = self.flood_queue
+        while adjacent_open_cells and len(new_open_cells) < self.max_flood_cells:
+            row, column = adjacent_open_cells.popleft()
+            for row_offset, column_offset in ADJACENT_OFFSETS:
+                adjacent_row, adjacent_column = row + row_offset, column + column_offset
+                chunk_row, chunk_column, local_row, local_column = self.locate(adjacent_row, adjacent_column)
+                chunk = self.get_chunk(chunk_row, chunk_column)
+                if chunk.cell_open[local_row, local_column]:
+                    continue
+
+                # cells next to a cell with zero adjacent black holes are never black holes
+                self.open_cell(chunk, local_row, local_column)
+                new_open_cells.append((adjacent_row, adjacent_column))
+                if self.get_adjacent_black_holes(chunk_row, chunk_column)[local_row, local_column] == 0:
+                    adjacent_open_cells.append((adjacent_row, adjacent_column))
+
+        return new_open_cells
+
+    def get_view(self, top, left, height, width):
+        """
+            This function builds matrices of a rectangle of the board, e.g. of a viewport, creating chunks which it
+            reaches
+        :param top: int, a row of the top left cell
+        :param left: int, a column of the top left cell
+        :param height: int, a height of the rectangle
+        :param width: int, a width of the rectangle
+        :return:
+            cell_open - np.array of shape (height, width) of open cell flags
+            adjacent_black_holes - np.array of shape (height, width), -1 for closed cells
+        """
+        cell_open = np.zeros((height, width), dtype=bool)
+        adjacent_black_holes = np.full((height, width), -1, dtype=np.int8)
+
+        first_chunk_row, first_chunk_column, _, _ = self.locate(top, left)
+        last_chunk_row, last_chunk_column, _, _ = self.locate(top + height - 1, left + width - 1)
+        for chunk_row in range(first_chunk_row, last_chunk_row + 1):
+            for chunk_column in range(first_chunk_column, last_chunk_column + 1):
+                # an intersection of the rectangle with the chunk in coordinates of the board
+                rows = slice(max(top, chunk_row * self.chunk_size),
+                             min(top + height, (chunk_row + 1) * self.chunk_size))
+                columns = slice(max(left, chunk_column * self.chunk_size),
+                                min(left + width, (chunk_column + 1) * self.chunk_size))
+                chunk_rows = slice(rows.start - chunk_row * self.chunk_size, rows.stop - chunk_row * self.chunk_size)
+                chunk_columns = slice(columns.start - chunk_column * self.chunk_size,
+                                      columns.stop - chunk_column * self.chunk_size)
+                view_rows = slice(rows.start - top, rows.stop - top)
+                view_columns = slice(columns.start - left, columns.stop - left)
+
+                chunk = self.get_chunk(chunk_row, chunk_column)
+                chunk_open = chunk.cell_open[chunk_rows, chunk_columns]
+                cell_open[view_rows, view_columns] = chunk_open
+                if chunk.n_open_cells:
+                    chunk_adjacent = self.get_adjacent_black_holes(chunk_row, chunk_column)[chunk_rows, chunk_columns]
+                    adjacent_black_holes[view_rows, view_columns] = np.where(chunk_open, chunk_adjacent, -1)
+
+        return cell_open, adjacent_black_holes
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of arrays of all chunks in memory
+        :return:
+            int
+        """
+        return sum(chunk.nbytes for chunk in self.chunks.values())
@@ -0,0 +1,145 @@
+from functools import lru_cache
+import numpy as np
+
+# kinds of boards: a rectangle, and a torus on which the edges wrap around
+RECTANGLE = "rectangle"
+TORUS = "torus"
+TOPOLOGIES = (RECTANGLE, TORUS)
+
+# row and column offsets of the 8 adjacent cells
+ADJACENT_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# a number of board sizes whose indexes are kept
+CACHE_SIZE = 16
+
+
+def check_topology(height, width, kind):
+    """
+        The function checks that a board of the size can have the topology
+    :param height: int, a height of the board
+    :param width: int, a width of the board
+    :param kind: str, RECTANGLE or TORUS
+    :return:
+    """
+    if kind not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {kind}, expected one of {TOPOLOGIES}")
+    if kind == TORUS and min(height, width) < 3:
+        raise ValueError("A torus needs at least 3 rows and 3 columns, otherwise adjacent cells repeat")
+
+
+class Topology:
+    """
+        An index of adjacent cells of a board in the CSR layout: adjacent cells of the cell i are
+        indices[offsets[i]:offsets[i + 1]]. Indexes are shared by all boards of the same size, so they are read-only
+    """
+
+    def __init__(self, height, width, kind=RECTANGLE):
+        check_topology(height, width, kind)
+        self.height = height
+        self.width = width
+        self.kind = kind
+        self.n_cells = height * width
+        self.offsets, self.indices = self.build()
+
+    @property
+    def wrap(self):
+        """
+            The property returns whether the edges of the board wrap around
+        :return:
+            bool
+        """
+        return self.kind == TORUS
+
+    def build(self):
+        """
+            This function builds the index of adjacent cells for every cell at once
+        :return:
+            offsets - np.array of shape (n_cells + 1,) of starts of adjacent cells of every cell in indices
+            indices - np.array of flat indexes of adjacent cells
+        """
+        rows, cols = np.divmod(np.arange(self.n_cells), self.width)
+
+        # generating all potential adjacent cells, the ones outside of a rectangle are not visible
+        adjacent = np.empty((self.n_cells, len(ADJACENT_OFFSETS)), dtype=np.int64)
+        visible = np.ones_like(adjacent, dtype=bool)
+        for i, (row_offset, col_offset) in enumerate(ADJACENT_OFFSETS):
+            adjacent_rows = rows + row_offset
+            adjacent_cols = cols + col_offset
+            if self.wrap:
+                adjacent_rows %= self.height
+                adjacent_cols %= self.width
+            else:
+                visible[:, i] = (adjacent_rows >= 0) & (adjacent_rows < self.height) & \
+                                (adjacent_cols >= 0) & (adjacent_cols < self.width)
+            adjacent[:, i] = adjacent_rows * self.width + adjacent_cols
+
+        # keeping only visible cells, row by row
+        offsets = np.zeros(self.n_cells + 1, dtype=np.int64)
+        np.cumsum(visible.sum(axis=1), out=offsets[1:])
+        indices = adjacent[visible].astype(np.int32 if self.n_cells < 2 ** 31 else np.int64)
+        offsets.setflags(write=False)
+        indices.setflags(write=False)
+
+        return offsets, indices
+
+    def get_adjacent(self, cell):
+        """
+            This function returns adjacent cells of a cell
+        :param cell: a flat cell index
+        :return:
+            np.array of flat cell indexes
+        """
+        return self.indices[self.offsets[cell]:self.offsets[cell + 1]]
+
+    def get_adjacent_batch(self, cells, mask=None):
+        """
+            This function returns adjacent cells of many cells at once in the CSR layout, so only the given cells
+            are touched
+        :param cells: np.array of flat cell indexes
+        :param mask: np.array of shape (n_cells,) of boolean values, only adjacent cells marked in it are kept, or
+            None to keep all of them
+        :return:
+            adjacent - np.array of flat indexes of adjacent cells of all the cells one after another
+            offsets - np.array of shape (len(cells) + 1,), adjacent cells of cells[i] are
+            adjacent[offsets[i]:offsets[i + 1]]
+        """
+        starts = self.offsets[cells]
+        counts = self.offsets[cells + 1] - starts
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # positions of adjacent cells in the index: a range from the start of every cell
+        positions = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], counts)
+        adjacent = self.indices[positions]
+        if mask is None:
+            return adjacent, offsets
+
+        # moving the offsets by # of dropped cells before them
+        kept = mask[adjacent]
+        kept_offsets = np.zeros(len(kept) + 1, dtype=np.int64)
+        np.cumsum(kept, out=kept_offsets[1:])
+
+        return adjacent[kept], kept_offsets[offsets]
+
+    @property
+    def nbytes(self):
+        """
+            The property returns # of bytes of the index arrays
+        :return:
+            int
+        """
+        return self.offsets.nbytes + self.indices.nbytes
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_topology(height, width, kind=RECTANGLE):
+    """
+        The function returns the index of adjacent cells of a board, building it only for sizes which are not
+        among the recently used ones
+    :param height: int, a height of the board
+    :param width: int, a width of the board
+    :param kind: str, RECTANGLE or TORUS
+    :return:
+        topology - Topology
+    """
+    return Topology(height, width, kind)
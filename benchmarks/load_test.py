@@ -0,0 +1,109 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from application.sessions import SessionManager
+from benchmarks.run_benchmarks import get_metadata
+
+# numbers of concurrent sessions
+SESSION_COUNTS = (100, 1000, 5000, 10000)
+# a share of requests which flag a cell instead of clicking it
+FLAG_SHARE = 0.1
+
+
+def run_load(n_sessions, n_requests, height, width, n_black_holes, max_active, seed=0):
+    """
+        The function drives sessions with requests to random cells of random sessions, a finished game is closed and
+        replaced by a new session, so the number of sessions stays the same
+    :param n_sessions: int, a number of concurrent sessions
+    :param n_requests: int, a number of timed requests
+    :param height: int, a height of boards
+    :param width: int, a width of boards
+    :param n_black_holes: int, a number of black holes on a board
+    :param max_active: int, a maximum number of sessions in memory
+    :param seed: int, a seed of games and requests
+    :return:
+        result - dict
+    """
+    rng = np.random.default_rng(seed)
+    directory = tempfile.mkdtemp(prefix="load-test-")
+    manager = SessionManager(directory=directory, max_active=max_active)
+
+    def create():
+        return manager.handle({"action": "create", "height": height, "width": width,
+                               "n_black_holes": n_black_holes, "seed": int(rng.integers(2 ** 63))})["session_id"]
+
+    start = time.perf_counter()
+    session_ids = [create() for _ in range(n_sessions)]
+    create_s = time.perf_counter() - start
+
+    # timing every request separately, replacing finished games is not timed
+    latencies = np.empty(n_requests)
+    sessions = rng.integers(n_sessions, size=n_requests)
+    cells = rng.integers(height * width, size=n_requests)
+    flags = rng.random(n_requests) < FLAG_SHARE
+    n_finished = 0
+    start = time.perf_counter()
+    for i in range(n_requests):
+        request = {"action": "flag" if flags[i] else "click", "session_id": session_ids[sessions[i]],
+                   "cell": int(cells[i])}
+        request_start = time.perf_counter()
+        response = manager.handle(request)
+        latencies[i] = time.perf_counter() - request_start
+        if response["status"] != "playing":
+            manager.handle({"action": "close", "session_id": session_ids[sessions[i]]})
+            session_ids[sessions[i]] = create()
+            n_finished += 1
+    total_s = time.perf_counter() - start
+
+    stats = manager.stats()
+    for session_id in session_ids:
+        manager.handle({"action": "close", "session_id": session_id})
+    shutil.rmtree(directory)
+    p50, p99 = np.percentile(latencies * 1e3, [50, 99])
+
+    return {"n_sessions": n_sessions,
+            "n_requests": n_requests,
+            "max_active": max_active,
+            "create_per_s": n_sessions / create_s,
+            "requests_per_s": n_requests / total_s,
+            "p50_ms": p50,
+            "p99_ms": p99,
+            "max_ms": latencies.max() * 1e3,
+            "n_finished": n_finished,
+            "n_evictions": stats["n_evictions"],
+            "n_loads": stats["n_loads"],
+            "active_nbytes": stats["nbytes"],
+            "nbytes_per_session": stats["nbytes"] / max(stats["n_active"], 1)}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="A load test of many concurrent sessions in one process")
+    parser.add_argument("--output", default="load_test_output.json", help="a path of the JSON results")
+    parser.add_argument("--sessions", nargs="+", type=int, default=list(SESSION_COUNTS))
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=16)
+    parser.add_argument("--black-holes", type=int, default=40)
+    parser.add_argument("--max-active", type=int, default=1000, help="a maximum number of sessions in memory")
+    parser.add_argument("--seed", type=int, default=0)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = []
+    for n_sessions in args.sessions:
+        result = run_load(n_sessions, args.requests, args.height, args.width, args.black_holes, args.max_active,
+                          seed=args.seed)
+        results.append(result)
+        print(f"{n_sessions:7} sessions {result['requests_per_s']:10.0f} req/s p50 {result['p50_ms']:7.3f} ms "
+              f"p99 {result['p99_ms']:7.3f} ms {result['n_loads']:7} loads "
+              f"{result['nbytes_per_session']:8.0f} B/session", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump({"metadata": get_metadata(), "results": results}, f, indent=2)
@@ -0,0 +1,299 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from application.board import Board
+from application.core import GameCore
+from application.topology import get_topology
+
+# boards of the Easy/Medium/Hard presets and larger custom boards
+SIZES = (8, 16, 24, 50, 100, 200, 400)
+# shares of cells which are black holes
+DENSITIES = (0.1, 0.15, 0.2)
+# the grid of buttons is limited by MATRIX_SIZE.MAX
+BUTTONS_MAX_SIZE = 40
+
+
+def create_game(size, n_black_holes, seed):
+    """
+        The function creates a game with black holes placed after a click in the center of the board
+    :param size: int, a size of a matrix
+    :param n_black_holes: int, a number of black holes
+    :param seed: int, a seed of the game
+    :return:
+        game - GameCore
+        cell - a flat index of the clicked cell, it has zero adjacent black holes
+    """
+    game = GameCore(height=size, width=size, n_black_holes=n_black_holes, seed=seed, first_click_safe=True)
+    cell = (size // 2) * size + size // 2
+    game.generate_black_holes(safe_cell=cell)
+
+    return game, cell
+
+
+def stage_board(size, n_black_holes, seed):
+    """
+        The function defines a stage of creating a board with its adjacent cells index, the cache of indexes is
+        cleared, so the index is built every time
+    """
+    def run(_):
+        board = Board(height=size, width=size)
+        return board.topology
+
+    return get_topology.cache_clear, run
+
+
+def stage_board_cached(size, n_black_holes, seed):
+    """
+        The function defines a stage of creating a board when a board of the same size was created before, e.g. on
+        a restart
+    """
+    def setup():
+        return Board(height=size, width=size).topology
+
+    def run(_):
+        board = Board(height=size, width=size)
+        return board.topology
+
+    return setup, run
+
+
+def stage_generate_black_holes(size, n_black_holes, seed):
+    """
+        The function defines a stage of generating black holes
+    """
+    def setup():
+        return GameCore(height=size, width=size, n_black_holes=n_black_holes, seed=seed, first_click_safe=True)
+
+    def run(game):
+        game.generate_black_holes()
+
+    return setup, run
+
+
+def stage_calculate_adjacent_black_holes(size, n_black_holes, seed):
+    """
+        The function defines a stage of calculating # of adjacent black holes
+    """
+    def setup():
+        return create_game(size, n_black_holes, seed)[0]
+
+    def run(game):
+        game.calculate_adjacent_black_holes()
+
+    return setup, run
+
+
+def stage_get_all_cells_to_open(size, n_black_holes, seed):
+    """
+        The function defines a stage of finding all cells to open after a click on a cell with zero adjacent black
+        holes
+    """
+    def setup():
+        game, cell = create_game(size, n_black_holes, seed)
+        game.board.topology
+        return game, cell
+
+    def run(state):
+        game, cell = state
+        game.get_all_cells_to_open(cell)
+
+    return setup, run
+
+
+def stage_reveal(size, n_black_holes, seed):
+    """
+        The function defines a stage of handling clicks: the first click, and clicks on random closed cells until
+        the game is over
+    """
+    def setup():
+        game = GameCore(height=size, width=size, n_black_holes=n_black_holes, seed=seed, first_click_safe=True)
+        order = np.random.default_rng(seed).permutation(game.board.n_cells)
+        return game, (size // 2) * size + size // 2, order
+
+    def run(state):
+        game, cell, order = state
+        game.reveal(cell)
+        for cell in order.tolist():
+            if game.status != GameCore.PLAYING:
+                break
+            if not game.board.cell_open[cell]:
+                game.reveal(cell)
+
+    return setup, run
+
+
+def stage_update_buttons(size, n_black_holes, seed):
+    """
+        The function defines a stage of updating cell buttons after the first click
+    """
+    from application.settings import Settings
+    from ui.renderers import ButtonGridRenderer
+    from ui.widgets import Widgets
+
+    with open("config.json", "r") as f:
+        settings = Settings(configs=json.load(f))
+    renderer = ButtonGridRenderer(app_widgets=Widgets(settings=settings), settings=settings, on_click=None)
+
+    def setup():
+        game, cell = create_game(size, n_black_holes, seed)
+        renderer.game = game
+        renderer.buttons = [None] * game.board.n_cells
+        renderer.get_buttons()
+        return game.reveal(cell)
+
+    def run(new_open_cells):
+        renderer.reveal_cells(new_open_cells)
+
+    return setup, run
+
+
+STAGES = {
+    "board": stage_board,
+    "board_cached": stage_board_cached,
+    "generate_black_holes": stage_generate_black_holes,
+    "calculate_adjacent_black_holes": stage_calculate_adjacent_black_holes,
+    "get_all_cells_to_open": stage_get_all_cells_to_open,
+    "reveal": stage_reveal,
+    "update_buttons": stage_update_buttons,
+}
+
+
+def measure(setup, run, repeats):
+    """
+        The function measures wall time of a stage, and its memory allocations with tracemalloc in a separate run,
+        the setup is not measured
+    :param setup: a function which returns the state of the stage
+    :param run: a function which takes the state
+    :param repeats: int, a number of timed runs
+    :return:
+        measurements - dict
+    """
+    times = []
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+
+    # tracing allocations slows the code down, so they are measured apart from the time
+    state = setup()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        run(state)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"repeats": repeats,
+            "time_min_s": min(times),
+            "time_median_s": statistics.median(times),
+            "allocated_bytes": after - before,
+            "peak_bytes": peak - before}
+
+
+def run_benchmarks(stages, sizes, densities, repeats, seed=0):
+    """
+        The function runs the stages over all sizes and densities
+    :param stages: a list of names of stages
+    :param sizes: a list of sizes of a matrix
+    :param densities: a list of shares of black hole cells
+    :param repeats: int, a number of timed runs
+    :param seed: int, a seed of games
+    :return:
+        results - a list of dicts
+    """
+    results = []
+    for stage in stages:
+        for size in sizes:
+            if stage == "update_buttons" and size > BUTTONS_MAX_SIZE:
+                continue
+            for density in densities:
+                n_black_holes = max(1, min(int(size * size * density), size * size - 9))
+                setup, run = STAGES[stage](size, n_black_holes, seed)
+                result = {"stage": stage, "height": size, "width": size, "n_black_holes": n_black_holes,
+                          "density": density}
+                result.update(measure(setup, run, repeats))
+                results.append(result)
+                print(f"{stage:32} {size:4}x{size:<4} {density:5.2f} {result['time_median_s'] * 1e3:10.3f} ms "
+                      f"{result['peak_bytes'] / 1024:10.1f} KiB", file=sys.stderr)
+
+    return results
+
+
+def get_metadata():
+    """
+        The function describes the environment of the run
+    :return:
+        metadata - dict
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+
+    return {"commit": commit or None,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def compare(results, baseline_results, threshold):
+    """
+        The function compares median times with a baseline run
+    :param results: a list of dicts of the current run
+    :param baseline_results: a list of dicts of the baseline run
+    :param threshold: float, a ratio of times above which a stage is a regression
+    :return:
+        regressions - a list of dicts
+    """
+    def key(result):
+        return result["stage"], result["height"], result["width"], result["n_black_holes"]
+
+    baseline = {key(result): result for result in baseline_results}
+    regressions = []
+    for result in results:
+        if key(result) in baseline:
+            ratio = result["time_median_s"] / baseline[key(result)]["time_median_s"]
+            if ratio > threshold:
+                regressions.append({"stage": result["stage"], "height": result["height"],
+                                    "n_black_holes": result["n_black_holes"], "ratio": ratio})
+
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks of the game hot paths")
+    parser.add_argument("--output", default="bench_output.json", help="a path of the JSON results")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--densities", nargs="+", type=float, default=list(DENSITIES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="a path of JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="a ratio of times treated as a regression")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = {"metadata": get_metadata(),
+              "results": run_benchmarks(args.stages, args.sizes, args.densities, args.repeats, seed=args.seed)}
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            report["regressions"] = compare(report["results"], json.load(f)["results"], args.threshold)
+        for regression in report["regressions"]:
+            print(f"regression: {regression}", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
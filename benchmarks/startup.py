@@ -0,0 +1,77 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# modules which must be imported only on first use
+HEAVY_MODULES = ("pandas", "seaborn", "matplotlib", "PIL", "ipyevents")
+
+# a fresh interpreter times imports of the app, and creating the main menu like PlayGame.ipynb does
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+from application.settings import Settings
+from ui.widgets import Widgets
+from ui.widget_utils import Utils
+imported = time.perf_counter()
+with open('config.json', 'r+') as f:
+    configs = json.load(f)
+if len(sys.argv) > 1:
+    configs["RENDERER"]["BACKEND"] = sys.argv[1]
+settings = Settings(configs=configs)
+app_widgets = Widgets(settings=settings)
+utils = Utils(app_widgets=app_widgets, settings=settings)
+ui_app = utils.app_widgets.ui_app
+created = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "menu_s": created - imported, "total_s": created - start,
+                  "heavy_modules": [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_startup(repeats, backend=None):
+    """
+        The function measures time to the first menu in fresh interpreters
+    :param repeats: int, a number of interpreters to start
+    :param backend: str or None, a rendering backend instead of the one of config.json
+    :return:
+        runs - a list of dicts with import_s, menu_s, total_s and heavy_modules
+    """
+    runs = []
+    for _ in range(repeats):
+        command = [sys.executable, "-c", STARTUP_SCRIPT] + ([backend] if backend else [])
+        output = subprocess.run(command, capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    return runs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time to the first menu of the game")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="a budget of the median time to the menu, seconds")
+    parser.add_argument("--output", help="a path of the JSON results")
+    parser.add_argument("--backend", choices=["buttons", "canvas"], help="a rendering backend to check")
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    runs = measure_startup(args.repeats, backend=args.backend)
+    report = {"budget_s": args.budget,
+              "median_total_s": statistics.median(run["total_s"] for run in runs),
+              "median_import_s": statistics.median(run["import_s"] for run in runs),
+              "median_menu_s": statistics.median(run["menu_s"] for run in runs),
+              "heavy_modules": sorted({name for run in runs for name in run["heavy_modules"]}),
+              "runs": runs}
+    print(json.dumps({key: value for key, value in report.items() if key != "runs"}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    # failing if the menu is slower than the budget, or a heavy module is imported at startup
+    if report["median_total_s"] > args.budget or report["heavy_modules"]:
+        sys.exit(1)
@@ -0,0 +1,49 @@
+from ipywidgets import widgets
+
+
+class ButtonPool:
+
+    def __init__(self, settings, on_click=None):
+        self.settings = settings
+        self.on_click = on_click
+        self.buttons = []
+
+    def create_button(self):
+        """
+            This function creates a new cell button and observes clicks to it
+        :return:
+            button - widgets.Button
+        """
+        button = widgets.Button(
+            style={"button_color": self.settings.handle_color.get("WON")},
+            layout={"height": self.settings.cell.get("HEIGHT_CELL"),
+                    "width": self.settings.cell.get("WIDTH_CELL"),
+                    "border": self.settings.borders.get("CELL"),
+                    })
+        if self.on_click is not None:
+            button.on_click(self.on_click)
+
+        return button
+
+    def get_button(self, index, tooltip=""):
+        """
+            This function takes a button from the pool, creating it only if the pool is not large enough yet, and
+            resets its traits to the initial state
+        :param index: int, a position of the button in the pool
+        :param tooltip: str, a tooltip of the button
+        :return:
+            button - widgets.Button
+        """
+        # growing the pool up to the requested position
+        while len(self.buttons) <= index:
+            self.buttons.append(self.create_button())
+
+        # resetting the traits changed during a previous game
+        button = self.buttons[index]
+        with button.hold_sync(), button.style.hold_sync():
+            button.description = ""
+            button.tooltip = tooltip
+            button.disabled = False
+            button.style.button_color = self.settings.handle_color.get("WON")
+
+        return button
@@ -0,0 +1,134 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EventPipeline:
+    """
+        A pipeline of events on the asyncio loop of the kernel: events which come while a batch is processed are
+        coalesced into the next batch, batches are processed off the loop in one worker thread, and results are
+        applied to widgets on the loop at most once per frame. A disabled pipeline, or a pipeline without a running
+        loop, processes and applies every event at once
+    """
+
+    def __init__(self, process, apply, enabled=False, frame_ms=16, debounce_ms=150):
+        self.process = process
+        self.apply = apply
+        self.enabled = enabled
+        self.frame_ms = frame_ms
+        self.debounce_ms = debounce_ms
+
+        self.pending = []
+        self.task = None
+        self.executor = None
+        self.next_frame = 0.
+        self.debounced = {}
+
+    @classmethod
+    def from_settings(cls, settings, process, apply):
+        """
+            This function creates the pipeline from the settings
+        :param settings: Settings
+        :param process: a function which takes a list of events, and returns a result, it runs in a worker thread
+        :param apply: a function which takes a result of process, and updates widgets
+        :return:
+            event_pipeline - EventPipeline
+        """
+        events = settings.events or {}
+
+        return cls(process=process, apply=apply, enabled=events.get("ASYNC", False),
+                   frame_ms=events.get("FRAME_MS", 16), debounce_ms=events.get("DEBOUNCE_MS", 150))
+
+    @staticmethod
+    def get_running_loop():
+        """
+            This function returns the running asyncio loop, or None outside of a running loop, then events are
+            handled at once
+        :return:
+            loop - asyncio loop or None
+        """
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def submit(self, event):
+        """
+            This function adds an event to the pipeline
+        :param event: an event passed to process
+        :return:
+        """
+        if not self.enabled or self.get_running_loop() is None:
+            self.apply(self.process([event]))
+            return
+
+        self.pending.append(event)
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+            self.task.add_done_callback(self.check_task)
+
+    async def run(self):
+        """
+            This function processes pending events in batches until there are none
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="events")
+
+        while self.pending:
+            events, self.pending = self.pending, []
+            result = await loop.run_in_executor(self.executor, self.process, events)
+
+            # waiting for the next frame, events which come meanwhile are processed in the next batch
+            delay = self.next_frame - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.apply(result)
+            self.next_frame = loop.time() + self.frame_ms / 1000
+
+    @staticmethod
+    def check_task(task):
+        """
+            This function raises an error of a finished batch on the loop, so it is reported by the kernel
+        :param task: asyncio task
+        :return:
+        """
+        if not task.cancelled():
+            task.result()
+
+    def debounce(self, key, func, *args):
+        """
+            This function calls a function after no calls with the same key come for debounce_ms, only the latest
+            arguments are used
+        :param key: a key of calls
+        :param func: a function to call
+        :param args: arguments of the function
+        :return:
+        """
+        loop = self.get_running_loop() if self.enabled else None
+        if loop is None:
+            func(*args)
+            return
+
+        handle = self.debounced.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self.debounced[key] = loop.call_later(self.debounce_ms / 1000, self.call_debounced, key, func, args)
+
+    def call_debounced(self, key, func, args):
+        """
+            This function calls a debounced function
+        :param key: a key of calls
+        :param func: a function to call
+        :param args: arguments of the function
+        :return:
+        """
+        del self.debounced[key]
+        func(*args)
+
+    def clear(self):
+        """
+            This function drops pending events, e.g. of a game which is over
+        :return:
+        """
+        self.pending.clear()
@@ -0,0 +1,507 @@
+from contextlib import ExitStack
+from io import BytesIO
+from IPython.display import display
+import numpy as np
+from application.instrumentation import Instrumentation
+from ui.button_pool import ButtonPool
+
+# RGB values of CSS color names used in the settings, other colors are given as "#rrggbb"
+NAMED_COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "grey": (128, 128, 128), "gray": (128, 128, 128),
+    "darkgrey": (169, 169, 169), "darkgray": (169, 169, 169), "lightgrey": (211, 211, 211),
+    "lightgray": (211, 211, 211), "silver": (192, 192, 192), "red": (255, 0, 0), "darkred": (139, 0, 0),
+    "orange": (255, 165, 0), "darkorange": (255, 140, 0), "gold": (255, 215, 0), "yellow": (255, 255, 0),
+    "green": (0, 128, 0), "darkgreen": (0, 100, 0), "lime": (0, 255, 0), "limegreen": (50, 205, 50),
+    "blue": (0, 0, 255), "navy": (0, 0, 128), "royalblue": (65, 105, 225), "dodgerblue": (30, 144, 255),
+    "deepskyblue": (0, 191, 255), "skyblue": (135, 206, 235), "lightskyblue": (135, 206, 250),
+    "steelblue": (70, 130, 180), "cornflowerblue": (100, 149, 237), "cyan": (0, 255, 255), "teal": (0, 128, 128),
+    "purple": (128, 0, 128), "magenta": (255, 0, 255), "pink": (255, 192, 203), "brown": (165, 42, 42),
+}
+
+
+class ButtonGridRenderer:
+    """
+        A rendering backend which draws every cell as a separate button of a grid layout
+    """
+
+    def __init__(self, app_widgets, settings, on_click, instrumentation=None):
+        self.app_widgets = app_widgets
+        self.settings = settings
+        self.on_click = on_click
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.button_pool = ButtonPool(settings=settings, on_click=self.on_click_button)
+        self.game = None
+        self.buttons = None
+        self.n_rendered_rows = 0
+
+    def on_click_button(self, button):
+        """
+            This function passes a cell of the clicked button to the game logic
+        :param button: cell button
+        :return:
+        """
+        self.on_click(button.cell)
+
+    def render(self, game):
+        """
+            This function outputs the grid layout with buttons for the game, in the lazy mode only the first rows are
+            rendered, and the next rows are rendered when a player asks for them
+        :param game: Game
+        :return:
+        """
+        self.game = game
+        self.buttons = [None] * game.board.n_cells
+
+        self.n_rendered_rows = self.get_lazy_rows() if self.settings.button_pool.get("LAZY") else game.height
+        with self.instrumentation.timer("start.buttons"):
+            grid_buttons = self.get_rows_buttons(0, self.n_rendered_rows)
+        with self.instrumentation.timer("start.display"):
+            self.app_widgets.create_grid(grid_buttons, game.width)
+            with self.app_widgets.output:
+                display(self.app_widgets.grid)
+                if self.n_rendered_rows < game.height:
+                    self.app_widgets.create_more_rows_button(self.render_more_rows)
+                    display(self.app_widgets.more_rows_button)
+
+    def get_lazy_rows(self):
+        """
+            This function returns # of rows rendered at once in the lazy mode
+        :return:
+            lazy_rows - int
+        """
+        return min(self.settings.button_pool.get("LAZY_ROWS"), self.game.height)
+
+    def render_more_rows(self, _=None):
+        """
+            This function renders the next rows of the grid in the lazy mode, their buttons are created only now
+        :param _: the button which asks for more rows
+        :return:
+        """
+        end_row = min(self.n_rendered_rows + self.get_lazy_rows(), self.game.height)
+        with self.instrumentation.timer("start.buttons"):
+            grid_buttons = self.get_rows_buttons(self.n_rendered_rows, end_row)
+        self.app_widgets.append_grid_buttons(grid_buttons, self.game.width)
+        self.n_rendered_rows = end_row
+        if end_row == self.game.height:
+            self.app_widgets.more_rows_button.close()
+
+    def create_expanded_button(self, cell):
+        """
+            The function create a button for a cell
+        :param cell: a flat index of the cell
+        :return:
+            button - widgets.Button with special properties
+        """
+
+        # extracting a number of a cell
+        number = cell + 1
+
+        # taking a button from the pool and setting its properties, black holes are read from the board when the
+        # button is opened, as they can be placed only on the first click
+        button = self.button_pool.get_button(cell, tooltip=f"{number}")
+        button.cell = cell
+
+        return button
+
+    def get_rows_buttons(self, start_row, end_row):
+        """
+            This function extracts buttons of the given rows to a list, creating them on the first access
+        :param start_row: int, the first row
+        :param end_row: int, the row after the last one
+        :return:
+           grid_buttons: a list of buttons
+        """
+        start_cell = start_row * self.game.width
+        end_cell = min(end_row, self.game.height) * self.game.width
+        for cell in range(start_cell, end_cell):
+            if self.buttons[cell] is None:
+                self.buttons[cell] = self.show_state(self.create_expanded_button(cell))
+
+        return self.buttons[start_cell:end_cell]
+
+    def show_state(self, button):
+        """
+            This function shows the current state of the cell on a button created after the game has started, e.g.
+            on a row rendered later in the lazy mode
+        :param button: the cell button object
+        :return:
+            button - the cell button object
+        """
+        game = self.game
+        if game.n_open_cells == 0 and not game.bits.flagged and game.status == game.PLAYING:
+            return button
+
+        with button.hold_sync(), button.style.hold_sync():
+            if game.board.cell_open[button.cell]:
+                self.open_cells(button)
+            elif game.bits.is_flagged(button.cell):
+                self.mark_flag(button)
+            if game.status == game.LOST:
+                self.open_black_holes(button)
+            elif game.status == game.WON and not game.board.cell_open[button.cell]:
+                self.disable(button)
+
+        return button
+
+    def get_buttons(self):
+        """
+            This function extracts all buttons to a list
+        :return:
+           grid_buttons: a list of buttons
+        """
+        grid_buttons = self.get_rows_buttons(0, self.game.height)
+
+        return grid_buttons
+
+    def update_buttons(self, cells, func_update):
+        """
+            This function updates only the given cell buttons, the grid layout itself is never rebuilt
+        :param cells: an iterable of flat cell indexes
+        :param func_update: a function to apply to buttons
+        :return:
+        """
+        # holding the sync of every updated button and its style, so all trait updates are sent at once on exit
+        with ExitStack() as stack:
+            for cell in cells:
+                cell_button = self.buttons[cell]
+                # buttons of rows which are not rendered yet show the state when they are created
+                if cell_button is None:
+                    continue
+                stack.enter_context(cell_button.hold_sync())
+                stack.enter_context(cell_button.style.hold_sync())
+                func_update(cell_button)
+
+    def reveal_cells(self, cells):
+        """
+            This function shows the given open cells
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        self.update_buttons(cells=cells, func_update=self.open_cells)
+
+    def reveal_black_holes(self):
+        """
+            This function shows all black holes and disables the rest of the cells
+        :return:
+        """
+        self.update_buttons(cells=range(self.game.board.n_cells), func_update=self.open_black_holes)
+
+    def flag_cells(self, cells):
+        """
+            This function shows whether the given cells are flagged
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        self.update_buttons(cells=cells, func_update=self.mark_flag)
+
+    def disable_cells(self, cells):
+        """
+            This function disables the given cells
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        self.update_buttons(cells=cells, func_update=self.disable)
+
+    def open_black_holes(self, button):
+        """
+            This function updates cells with black holes and disables the rest of the cell buttons
+        :param button: the cell button object
+        :return:
+        """
+        black_hole = self.game.board.black_holes[button.cell]
+        if black_hole:
+            button.style.button_color = self.settings.handle_color.get("LOST")
+        else:
+            button.disabled = True
+
+        return button
+
+    def mark_flag(self, button):
+        """
+            This function marks a flagged cell button or removes the mark
+        :param button: the cell button object
+        :return:
+        """
+        button.description = self.settings.cell.get("FLAG_NAME") if self.game.bits.is_flagged(button.cell) else ""
+
+        return button
+
+    @staticmethod
+    def disable(button):
+        """
+            This function disables all the cell buttons
+        :param button: the cell button object
+        :return:
+        """
+        button.disabled = True
+        return button
+
+    def open_cells(self, button):
+        """
+            This function updates cells without black holes
+        :param button: the cell button object
+        :return:
+        """
+        adjacent_bh = self.game.board.adjacent_black_holes[button.cell]
+        if adjacent_bh != 0:
+            button.description = str(adjacent_bh)
+            button.style.button_color = self.settings.handle_color.get("WARNING")
+        else:
+            button.description = ""
+            button.style.button_color = self.settings.handle_color.get("START_BUTTON")
+
+        return button
+
+
+class CanvasRenderer:
+    """
+        A rendering backend which draws the whole board as one image widget and maps clicks on it to cells, so the
+        number of widgets does not depend on the board size
+    """
+    # indexes of cell colors in the palette
+    CLOSED = 0
+    OPEN = 1
+    WARNING = 2
+    BLACK_HOLE = 3
+    FLAGGED = 4
+
+    # 3x5 bitmaps of the digits 1-8
+    DIGITS = {
+        1: (".#.", "##.", ".#.", ".#.", "###"),
+        2: ("##.", "..#", ".#.", "#..", "###"),
+        3: ("##.", "..#", ".#.", "..#", "##."),
+        4: ("#.#", "#.#", "###", "..#", "..#"),
+        5: ("###", "#..", "##.", "..#", "##."),
+        6: (".##", "#..", "###", "#.#", "###"),
+        7: ("###", "..#", ".#.", ".#.", ".#."),
+        8: ("###", "#.#", "###", "#.#", "###"),
+    }
+
+    def __init__(self, app_widgets, settings, on_click, instrumentation=None):
+        self.app_widgets = app_widgets
+        self.settings = settings
+        self.on_click = on_click
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.cell_pixels = settings.renderer.get("CANVAS").get("CELL_PIXELS")
+        self.game = None
+        self.event = None
+
+        # defining colors of cells, digits, and grid lines
+        self.palette = np.array([self.to_rgb(settings.handle_color.get("WON")),
+                                 self.to_rgb(settings.handle_color.get("START_BUTTON")),
+                                 self.to_rgb(settings.handle_color.get("WARNING")),
+                                 self.to_rgb(settings.handle_color.get("LOST")),
+                                 self.to_rgb(settings.handle_color.get("PRIMARY_COLOR"))], dtype=np.uint8)
+        self.text_color = self.to_rgb(settings.renderer.get("CANVAS").get("TEXT_COLOR"))
+        self.grid_color = self.to_rgb(settings.renderer.get("CANVAS").get("GRID_COLOR"))
+        self.glyphs = self.create_glyphs(self.cell_pixels)
+
+        # defining the state of cells
+        self.cell_colors = None
+        self.cell_glyphs = None
+        self.cell_disabled = None
+        self.pixels = None
+
+    @staticmethod
+    def to_rgb(color):
+        """
+            This function converts a color name to RGB values without the plotting stack, which is slow to import
+        :param color: str, a CSS color name of NAMED_COLORS, or a hex color "#rrggbb"
+        :return:
+            rgb - a tuple of ints from 0 to 255
+        """
+        if color.startswith("#") and len(color) == 7:
+            return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        if color.lower() not in NAMED_COLORS:
+            raise ValueError(f"Unknown color {color}, use one of {sorted(NAMED_COLORS)} or a hex color \"#rrggbb\"")
+
+        return NAMED_COLORS[color.lower()]
+
+    @classmethod
+    def create_glyphs(cls, cell_pixels):
+        """
+            This function scales digit bitmaps to the cell size
+        :param cell_pixels: int, a size of a cell in pixels
+        :return:
+            glyphs - np.array of shape (9, cell_pixels, cell_pixels) of boolean values, the index is a digit, and 0 is
+            an empty cell
+        """
+        glyphs = np.zeros((9, cell_pixels, cell_pixels), dtype=bool)
+
+        # fitting the 3x5 bitmap into the cell without its grid line
+        scale = (cell_pixels - 1) // 6
+        if scale == 0:
+            return glyphs
+        top = (cell_pixels - 1 - 5 * scale) // 2
+        left = (cell_pixels - 1 - 3 * scale) // 2
+        for digit, bitmap in cls.DIGITS.items():
+            bitmap = np.array([[pixel == "#" for pixel in line] for line in bitmap])
+            bitmap = bitmap.repeat(scale, axis=0).repeat(scale, axis=1)
+            glyphs[digit, top:top + 5 * scale, left:left + 3 * scale] = bitmap
+
+        return glyphs
+
+    def create_event(self):
+        """
+            This function observes clicks on the image, right clicks flag cells instead of the context menu
+        :return:
+        """
+        try:
+            from ipyevents import Event
+        except ImportError as error:
+            raise ImportError("The canvas renderer requires the ipyevents package: pip install ipyevents") from error
+
+        self.event = Event(source=self.app_widgets.canvas, watched_events=["click", "contextmenu"],
+                           prevent_default_action=True)
+        self.event.on_dom_event(self.on_click_image)
+
+    def render(self, game):
+        """
+            This function outputs the image of the board for the game
+        :param game: Game
+        :return:
+        """
+        self.game = game
+        n_cells = game.board.n_cells
+        self.cell_colors = np.full(n_cells, self.CLOSED, dtype=np.uint8)
+        self.cell_glyphs = np.zeros(n_cells, dtype=np.uint8)
+        self.cell_disabled = np.zeros(n_cells, dtype=bool)
+        self.pixels = np.zeros((game.height * self.cell_pixels, game.width * self.cell_pixels, 3), dtype=np.uint8)
+
+        # the image widget is created once and shown again for every game
+        with self.instrumentation.timer("start.display"):
+            if self.app_widgets.canvas is None:
+                self.app_widgets.create_canvas()
+                self.create_event()
+            self.draw_cells(np.arange(n_cells))
+            with self.app_widgets.output:
+                display(self.app_widgets.canvas)
+
+    def draw_cells(self, cells):
+        """
+            This function redraws tiles of the given cells and sends the image to the widget
+        :param cells: np.array of flat cell indexes
+        :return:
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        if len(cells) != 0:
+            # building tiles of cells with their colors, digits, and grid lines
+            colors = self.palette[self.cell_colors[cells]]
+            glyphs = self.glyphs[self.cell_glyphs[cells]]
+            tiles = np.where(glyphs[..., None], np.array(self.text_color, dtype=np.uint8),
+                             colors[:, None, None, :])
+            tiles[:, -1, :, :] = self.grid_color
+            tiles[:, :, -1, :] = self.grid_color
+
+            # placing tiles into the image viewed as (rows, tile rows, columns, tile columns, channels)
+            rows, cols = np.divmod(cells, self.game.width)
+            pixels = self.pixels.reshape(self.game.height, self.cell_pixels, self.game.width, self.cell_pixels, 3)
+            pixels[rows, :, cols, :, :] = tiles
+
+        self.app_widgets.canvas.value = self.encode()
+
+    def encode(self):
+        """
+            This function encodes the image to PNG
+        :return:
+            bytes
+        """
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.fromarray(self.pixels).save(buffer, format="png", compress_level=1)
+
+        return buffer.getvalue()
+
+    def cell_at(self, x, y):
+        """
+            This function maps a point of the image to a cell
+        :param x: float, a horizontal coordinate in image pixels
+        :param y: float, a vertical coordinate in image pixels
+        :return:
+            cell - a flat cell index or None if the point is outside the board
+        """
+        row = int(y // self.cell_pixels)
+        col = int(x // self.cell_pixels)
+        if 0 <= row < self.game.height and 0 <= col < self.game.width:
+            return row * self.game.width + col
+
+        return None
+
+    def on_click_image(self, event):
+        """
+            This function passes a cell under the click to the game logic, a right click flags the cell
+        :param event: a dict of the DOM event
+        :return:
+        """
+        # ipyevents reports image pixel coordinates as dataX/dataY, otherwise the displayed size is scaled back
+        if "dataX" in event:
+            x, y = event["dataX"], event["dataY"]
+        else:
+            x = event["relativeX"] * self.pixels.shape[1] / event["boundingRectWidth"]
+            y = event["relativeY"] * self.pixels.shape[0] / event["boundingRectHeight"]
+
+        cell = self.cell_at(x, y)
+        if cell is not None and not self.cell_disabled[cell]:
+            self.on_click(cell, flag=event.get("type") == "contextmenu")
+
+    def reveal_cells(self, cells):
+        """
+            This function shows the given open cells
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        adjacent_bh = self.game.board.adjacent_black_holes[cells]
+        self.cell_colors[cells] = np.where(adjacent_bh != 0, self.WARNING, self.OPEN)
+        self.cell_glyphs[cells] = adjacent_bh
+        self.draw_cells(cells)
+
+    def reveal_black_holes(self):
+        """
+            This function shows all black holes and disables the rest of the cells
+        :return:
+        """
+        cells = np.flatnonzero(self.game.board.black_holes)
+        self.cell_colors[cells] = self.BLACK_HOLE
+        self.cell_disabled[:] = True
+        self.draw_cells(cells)
+
+    def flag_cells(self, cells):
+        """
+            This function shows whether the given cells are flagged
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        cells = np.asarray(cells, dtype=np.int64)
+        flagged = np.array([self.game.bits.is_flagged(cell) for cell in cells.tolist()], dtype=bool)
+        self.cell_colors[cells] = np.where(flagged, self.FLAGGED, self.CLOSED)
+        self.draw_cells(cells)
+
+    def disable_cells(self, cells):
+        """
+            This function disables the given cells
+        :param cells: an iterable of flat cell indexes
+        :return:
+        """
+        self.cell_disabled[np.asarray(cells, dtype=np.int64)] = True
+
+
+RENDERERS = {
+    "buttons": ButtonGridRenderer,
+    "canvas": CanvasRenderer,
+}
+
+
+def create_renderer(app_widgets, settings, on_click, instrumentation=None):
+    """
+        This function creates the rendering backend chosen in the settings
+    :param app_widgets: Widgets
+    :param settings: Settings
+    :param on_click: a function which takes a flat index of the clicked cell, and whether to flag it
+    :param instrumentation: Instrumentation or None
+    :return:
+        renderer - ButtonGridRenderer or CanvasRenderer
+    """
+    return RENDERERS[settings.renderer.get("BACKEND")](app_widgets=app_widgets, settings=settings, on_click=on_click,
+                                                       instrumentation=instrumentation)
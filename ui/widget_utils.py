@@ -1,19 +1,58 @@
-from IPython.display import display
+import os
+import threading
+import time
+from functools import partial
 import numpy as np
+from application.board_pool import BoardPool
+from application.instrumentation import Instrumentation
+from application.persistence import load_game, save_game
+from application.replay import CHORD, FLAG, REVEAL, ReplayRecorder
 from application.simulate_data import Game
+from application.topology import RECTANGLE
 from application.settings import Settings
+from ui.event_pipeline import EventPipeline
+from ui.renderers import create_renderer
 from ui.widgets import Widgets
 
 
 class Utils:
+    # the last created instance, a new one closes it, e.g. when a cell of the notebook is run again
+    current = None
     game = None
     grid = None
+    recorder = None
+    # whether handlers of widgets are changing other widgets, their changes are not handled again
+    changing_widgets = False
 
     def __init__(self, app_widgets: Widgets, settings: Settings):
         self.app_widgets = app_widgets
         self.settings = settings
+        if Utils.current is not None:
+            Utils.current.close()
+        Utils.current = self
+
+        self.board_pool = BoardPool.from_settings(settings, create_game=self.create_game)
+        self.instrumentation = Instrumentation.from_settings(settings)
+        self.renderer = create_renderer(app_widgets=app_widgets, settings=settings, on_click=self.on_click_cell,
+                                        instrumentation=self.instrumentation)
+        self.events = EventPipeline.from_settings(settings, process=self.reveal_cells, apply=self.apply_reveal)
+        # held by a batch of clicks while it runs, the game and its log are replaced only between batches
+        self.game_lock = threading.Lock()
         self.observe_widgets()
         self.observe_clicks()
+        self.board_pool.configure(self.get_board_key())
+
+    def close(self):
+        """
+            This function stops the board pool thread and closes the log of the current game, the widgets still work,
+            and games are created when they are started
+        :return:
+        """
+        self.board_pool.close()
+        with self.game_lock:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
 
     def observe_clicks(self):
         """
@@ -24,104 +63,269 @@ class Utils:
 
     def on_button_clicked(self, button):
         """
-            This function updates the widgets of the main menu, outputs the grid layout with buttons for the game
-            and listens to clicks to the cell buttons
+            This function updates the widgets of the main menu, and outputs the board of the game with the chosen
+            rendering backend
         :param button: the start button
         :return:
         """
-        # updating the widgets
-        self.app_widgets.update_widgets(button_color="START_BUTTON", description="DESCRIPTION_STARTING",
-                                        validation_description="DESCRIPTION_LOAD")
-        self.app_widgets.output.clear_output(wait=True)
+        with self.instrumentation.timer("start"):
+            # updating the widgets
+            self.app_widgets.update_widgets(button_color="START_BUTTON", description="DESCRIPTION_STARTING",
+                                            validation_description="DESCRIPTION_LOAD")
+            self.app_widgets.output.clear_output(wait=True)
 
-        # creating the game, and the layout of buttons
-        self.game = Game(app_widgets=self.app_widgets, settings=self.settings)
-        self.app_widgets.create_grid(self.game.grid_buttons, self.game.matrix_size)
-        with self.app_widgets.output:
-            display(self.app_widgets.grid)
-        self.app_widgets.calculate_n_of_cells_to_open()
-        self.app_widgets.progress_bar.max = self.app_widgets.n_of_cells_to_open
+            # taking a pre-generated game of the chosen settings, and rendering its board
+            with self.instrumentation.timer("start.generation"):
+                game = self.board_pool.take(self.get_board_key())
+            self.events.clear()
+            self.set_game(game)
+            self.renderer.render(self.game)
+            self.app_widgets.n_of_cells_to_open = self.game.n_cells_to_open
+            self.app_widgets.progress_bar.max = self.app_widgets.n_of_cells_to_open
 
-        # observing to clicks to cell buttons
-        self.game.rows.loc[self.game.base_mask].button.apply(lambda x: x.on_click(self.on_click_cell))
+            # updating the widgets
+            self.app_widgets.update_widgets(description="DESCRIPTION_RESTART",
+                                            validation_description="DESCRIPTION_START",
+                                            progress_value="VALUE", progress_tooltip="DESCRIPTION_TOOLTIP")
 
-        # updating the widgets
-        self.app_widgets.update_widgets(description="DESCRIPTION_RESTART", validation_description="DESCRIPTION_START",
-                                        progress_value="VALUE", progress_tooltip="DESCRIPTION_TOOLTIP")
+    def get_board_key(self):
+        """
+            This function returns the chosen settings of a board
+        :return:
+            key - a tuple of a height, a width, and # of black holes
+        """
+        return self.app_widgets.get_board_shape() + (self.app_widgets.n_black_holes.value,)
 
-    def on_click_cell(self, button):
+    def create_game(self, key, seed):
         """
-            This function reacts on the cell button click:
-        :param button: cell button
+            This function creates a game with its own seed, it is called by the board pool in a background thread
+        :param key: a tuple of a height, a width, and # of black holes
+        :param seed: int, a seed of the game
         :return:
+            game - Game
         """
-        # extracting a cell button info
-        black_hole = button.black_hole
-        adjacent_bh = button.adjacent_bh
-        number = int(button.tooltip)
+        height, width, n_black_holes = key
+        game = Game(matrix_size=height, n_black_holes=n_black_holes, seed=seed,
+                    first_click_safe=self.settings.first_click_safe, width=width,
+                    topology=(self.settings.board or {}).get("TOPOLOGY", RECTANGLE))
+        # building the index of adjacent cells in advance, it is needed by the first click
+        game.board.topology
+
+        return game
+
+    def on_click_cell(self, cell, flag=False):
+        """
+            This function reacts on the cell click: the click is passed to the event pipeline, which opens cells off
+            the loop and updates cells once per frame, or at once if the pipeline is disabled. The click is timed from
+            here until its cells are updated
+        :param cell: a flat index of the cell clicked
+        :param flag: bool, whether to flag the cell, clicks also flag cells in the flag mode
+        :return:
+        """
+        self.events.submit((self.game, cell, flag or self.app_widgets.flag_mode.value, time.perf_counter()))
+
+    def reveal_cells(self, clicks):
+        """
+            This function applies clicks to the game: a flag click flags a cell or removes its flag, a click on an
+            open cell is a chord, and a click on a closed cell opens it. Clicks on a board of a previous game are
+            dropped, and the game and its log are taken together, so events are never written to a log of another
+            game
+        :param clicks: a list of tuples (the game clicked, a flat index of the cell clicked, whether to flag the cell,
+            time.perf_counter of the click)
+        :return:
+            game - the game in which cells are open
+            status - the state of the game before the clicks
+            new_open_cells - np.array of flat indexes of newly open cells
+            flagged_cells - a list of flat indexes of cells which are flagged or have lost their flags
+            click_starts - a list of times of the clicks on the game
+        """
+        with self.game_lock, self.instrumentation.timer("click.reveal"):
+            game = self.game
+            recorder = self.recorder
+            status = game.status
+            new_open_cells = []
+            flagged_cells = []
+            click_starts = [click_start for clicked_game, _, _, click_start in clicks if clicked_game is game]
+            for clicked_game, cell, flag, _ in clicks:
+                if clicked_game is not game:
+                    continue
+                if game.status != Game.PLAYING:
+                    break
+                if flag:
+                    action = FLAG
+                    game.flag(cell)
+                    flagged_cells.append(cell)
+                    n_opened = 0
+                else:
+                    action = CHORD if game.board.cell_open[cell] else REVEAL
+                    new_open_cells.append(game.chord(cell) if action == CHORD else game.reveal(cell))
+                    n_opened = len(new_open_cells[-1])
+                if recorder is not None:
+                    recorder.record(cell, action, n_opened, game.status)
+
+        new_open_cells = np.concatenate(new_open_cells) if new_open_cells else np.empty(0, dtype=int)
+
+        return game, status, new_open_cells, flagged_cells, click_starts
 
-        if black_hole:
-            # updating buttons and the widgets
+    def apply_reveal(self, result):
+        """
+            This function updates cells and the widgets after cells are open, and records latencies of the clicks
+            from their submission, including the wait for a batch and a frame
+        :param result: a tuple returned by reveal_cells
+        :return:
+        """
+        game, status, new_open_cells, flagged_cells, click_starts = result
+        try:
+            self.show_reveal(game, status, new_open_cells, flagged_cells)
+        finally:
+            end = time.perf_counter()
+            for click_start in click_starts:
+                self.instrumentation.record("click", end - click_start)
+
+    def show_reveal(self, game, status, new_open_cells, flagged_cells):
+        """
+            This function updates cells and the widgets after cells are open
+        :param game: the game in which cells are open
+        :param status: the state of the game before the clicks
+        :param new_open_cells: np.array of flat indexes of newly open cells
+        :param flagged_cells: a list of flat indexes of cells which are flagged or have lost their flags
+        :return:
+        """
+        # cells of a previous game are not shown
+        if game is not self.game:
+            return
+
+        if flagged_cells:
+            self.renderer.flag_cells(flagged_cells)
+
+        if len(new_open_cells) != 0:
+            # updating progress and only the cells which have just been opened
+            with self.instrumentation.timer("click.progress"):
+                self.update_progress()
+            with self.instrumentation.timer("click.render"):
+                self.renderer.reveal_cells(new_open_cells)
+
+        if game.status == status:
+            return
+
+        if game.status == Game.LOST:
+            # updating cells and the widgets
             self.app_widgets.update_widgets(button_color="LOST", description="DESCRIPTION_LOST")
-            self.update_buttons(mask=self.game.base_mask, func_update=self.open_black_holes)
-        else:
-            # if there are non-zero adjacent black hole cells
-            if adjacent_bh != 0:
-                # updating progress and buttons
-                self.update_progress(mask=self.game.base_mask & (self.game.rows.primary_key == number))
-                self.update_buttons(mask=self.game.base_mask & (self.game.rows.primary_key == number),
-                                    func_update=self.open_cells)
-            else:
-                # otherwise, finding all adjacent not black hole cells near to zero adjacent black hole cells
-                all_cells_to_open = self.game.get_all_cells_to_open(number=number)
-
-                # updating progress and buttons
-                self.update_progress(mask=self.game.base_mask & (self.game.rows.primary_key.isin(all_cells_to_open)))
-                self.update_buttons(mask=self.game.base_mask & (self.game.rows.primary_key.isin(all_cells_to_open)),
-                                    func_update=self.open_cells)
-
-            if self.game.n_open_cells == self.app_widgets.n_of_cells_to_open:
-                # if all not black hole cells are open, then updating buttons and the widgets
-                self.app_widgets.update_widgets(button_color="WON", description="DESCRIPTION_WON")
-                self.update_buttons(mask=self.game.base_mask & (self.game.rows.cell_open == 0),
-                                    func_update=self.disable)
-
-    def update_progress(self, mask):
+            with self.instrumentation.timer("click.render"):
+                self.renderer.reveal_black_holes()
+        elif game.status == Game.WON:
+            # if all not black hole cells are open, then updating cells and the widgets
+            self.app_widgets.update_widgets(button_color="WON", description="DESCRIPTION_WON")
+            self.renderer.disable_cells(np.flatnonzero(~game.board.cell_open))
+
+    def set_game(self, game, record=True):
         """
-            This function updates the progress bar
-        :param mask: pd.Series of boolean values
+            This function makes a game the current one. A batch of clicks which is running finishes first, so the
+            log of the previous game is closed after its last event
+        :param game: Game
+        :param record: bool, whether to start a log of the game if replays are enabled in the settings
+        :return:
+        """
+        with self.game_lock:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+            self.game = game
+            if record:
+                self.start_recording()
+
+    def start_recording(self):
+        """
+            This function starts a log of the current game if replays are enabled in the settings
+        :return:
+        """
+        if self.settings.replay and self.settings.replay.get("ENABLED"):
+            directory = self.settings.replay.get("DIRECTORY")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{time.strftime('%Y%m%d_%H%M%S')}_{self.game.seed}.log")
+            self.recorder = ReplayRecorder(game=self.game, path=path)
+
+    def save_game(self, path):
+        """
+            This function saves the current game to a file
+        :param path: str, a path of the file
+        :return:
+        """
+        save_game(self.game, path)
+
+    def resume_game(self, path):
+        """
+            This function loads a game from a file, and outputs its board in the saved state
+        :param path: str, a path of the file
         :return:
         """
-        # setting 1 to open cells and recalculating # of open cells
-        self.game.rows.loc[mask, "cell_open"] = 1
-        self.game.calculate_open_cells()
+        self.app_widgets.output.clear_output(wait=True)
+        self.events.clear()
 
-        # updating the widgets
+        # loading the game, and rendering its board with open cells, a resumed game is not recorded, as its log
+        # would not start from the beginning
+        self.set_game(load_game(path, cls=Game), record=False)
+        self.renderer.render(self.game)
+        self.renderer.reveal_cells(np.flatnonzero(self.game.board.cell_open))
+        self.renderer.flag_cells(np.flatnonzero(self.game.cell_flagged))
+        self.app_widgets.n_of_cells_to_open = self.game.n_cells_to_open
+        self.app_widgets.progress_bar.max = self.app_widgets.n_of_cells_to_open
+        self.update_progress()
+
+        # updating the widgets according to the state of the game
+        self.app_widgets.update_widgets(description="DESCRIPTION_RESTART", validation_description="DESCRIPTION_START")
+        if self.game.status == Game.LOST:
+            self.app_widgets.update_widgets(button_color="LOST", description="DESCRIPTION_LOST")
+            self.renderer.reveal_black_holes()
+        elif self.game.status == Game.WON:
+            self.app_widgets.update_widgets(button_color="WON", description="DESCRIPTION_WON")
+            self.renderer.disable_cells(np.flatnonzero(~self.game.board.cell_open))
+
+    def update_progress(self):
+        """
+            This function updates the progress bar
+        :return:
+        """
         self.app_widgets.progress_bar.value = self.game.n_open_cells
         progress = int(self.game.n_open_cells / self.app_widgets.progress_bar.max * 100)
         self.app_widgets.progress_bar.description_tooltip = f"{progress}% done "
+        self.app_widgets.restarted.description = f"Open cells: {self.game.n_open_cells}"
 
-    def update_buttons(self, mask, func_update):
+    def observe_widgets(self):
         """
-            This function updates cell buttons
-        :param mask: pd.Series of boolean mask
-        :param func_update: a function to apply to buttons
+            This function observes changes to the widgets
         :return:
         """
-        # updating buttons
-        self.game.rows.loc[mask, "button"] = self.game.rows.loc[mask, "button"].apply(
-            lambda cell_button: func_update(cell_button))
-        # updating the grid layout
-        self.app_widgets.grid.children = self.game.get_buttons()
+        self.app_widgets.difficulty.observe(partial(self.on_change_widget, self.handle_change_difficulty), 'value')
+        self.app_widgets.matrix_size.observe(partial(self.on_change_widget, self.handle_change_matrix), 'value')
+        self.app_widgets.n_black_holes.observe(partial(self.on_change_widget, self.handle_change_n_holes), 'value')
 
-    def observe_widgets(self):
+    def on_change_widget(self, handler, change):
         """
-            This function observes changes to the widgets
+            This function debounces changes to a widget, changes made by handlers themselves are skipped, so the
+            handlers do not cascade into each other
+        :param handler: a function which handles changes to the widget
+        :param change: an object with attributes of the widget
         :return:
         """
-        self.app_widgets.difficulty.observe(self.handle_change_difficulty, 'value')
-        self.app_widgets.matrix_size.observe(self.handle_change_matrix, 'value')
-        self.app_widgets.n_black_holes.observe(self.handle_change_n_holes, 'value')
+        if not self.changing_widgets:
+            self.events.debounce(handler.__name__, self.run_widget_handler, handler, change)
+
+    def run_widget_handler(self, handler, change):
+        """
+            This function runs a handler of changes to a widget
+        :param handler: a function which handles changes to the widget
+        :param change: an object with attributes of the widget
+        :return:
+        """
+        self.changing_widgets = True
+        try:
+            handler(change)
+        finally:
+            self.changing_widgets = False
+
+        # warming up the board pool for the new settings
+        self.board_pool.configure(self.get_board_key())
 
     def handle_change_difficulty(self, change):
         """
@@ -140,7 +344,8 @@ class Utils:
         :param change: an object with attributes of the widget
         :return:
         """
-        self.app_widgets.n_black_holes.max = np.max([change.owner.value * change.owner.value - 9, 1])
+        height, width = self.app_widgets.get_board_shape()
+        self.app_widgets.n_black_holes.max = np.max([height * width - 9, 1])
         if change.new != self.settings.difficulty_dict[self.app_widgets.difficulty.value][0]:
             self.app_widgets.difficulty.value = "Custom"
 
@@ -152,43 +357,3 @@ class Utils:
         """
         if change.new != self.settings.difficulty_dict[self.app_widgets.difficulty.value][1]:
             self.app_widgets.difficulty.value = "Custom"
-
-    def open_black_holes(self, button):
-        """
-            This function updates cells with black holes and disables the rest of the cell buttons
-        :param button: the cell button object
-        :return:
-        """
-        black_hole = button.black_hole
-        if black_hole:
-            button.style.button_color = self.settings.handle_color.get("LOST")
-        else:
-            button.disabled = True
-
-        return button
-
-    @staticmethod
-    def disable(button):
-        """
-            This function disables all the cell buttons
-        :param button: the cell button object
-        :return:
-        """
-        button.disabled = True
-        return button
-
-    def open_cells(self, button):
-        """
-            This function updates cells without black holes and updates the validation widget
-        :param button: the cell button object
-        :return:
-        """
-        adjacent_bh = button.adjacent_bh
-        if adjacent_bh != 0:
-            button.description = str(adjacent_bh)
-            button.style.button_color = self.settings.handle_color.get("WARNING")
-        else:
-            button.style.button_color = self.settings.handle_color.get("START_BUTTON")
-        self.app_widgets.restarted.description = f"Open cells: {self.game.n_open_cells}"
-
-        return button
@@ -4,13 +4,16 @@ from ipywidgets import widgets
 class Widgets:
     output = None
     start_button = None
+    flag_mode = None
     progress_bar = None
     n_black_holes = None
     matrix_size = None
     restarted = None
     difficulty = None
     grid = None
+    canvas = None
     grid_buttons = None
+    more_rows_button = None
     ui_main_menu = None
     ui_app = None
     n_of_cells_to_open = None
@@ -21,17 +24,65 @@ class Widgets:
         self.link_widgets()
         self.calculate_n_of_cells_to_open()
 
-    def create_grid(self, grid_buttons, matrix_size):
+    def create_grid(self, grid_buttons, width):
         """
-            This function creates a grid layout of buttons
-        :param grid_buttons: a list of buttons
-        :param matrix_size: int, a size of a matrix
+            This function creates a layout of blocks of rows of buttons, the first block has the given buttons
+        :param grid_buttons: a list of buttons of whole rows
+        :param width: int, a number of columns
         :return:
         """
-        self.grid = widgets.GridBox(children=grid_buttons,
-                                    layout={"grid_template_columns": ("auto " * matrix_size)[:-1],
-                                            "grid_template_rows": ("auto " * matrix_size)[:-1],
-                                            "overflow": "scroll"})
+        # closing the grid of the previous game, its buttons are kept in the pool
+        if self.grid is not None:
+            for block in self.grid.children:
+                block.close()
+            self.grid.close()
+        if self.more_rows_button is not None:
+            self.more_rows_button.close()
+            self.more_rows_button = None
+
+        self.grid = widgets.VBox(children=(self.create_grid_block(grid_buttons, width),),
+                                 layout={"overflow": "scroll"})
+
+    @staticmethod
+    def create_grid_block(grid_buttons, width):
+        """
+            This function creates a grid layout of buttons of whole rows, columns of all blocks have the same width
+        :param grid_buttons: a list of buttons of whole rows
+        :param width: int, a number of columns
+        :return:
+            block - widgets.GridBox
+        """
+        return widgets.GridBox(children=grid_buttons,
+                               layout={"grid_template_columns": ("1fr " * width)[:-1],
+                                       "grid_template_rows": ("auto " * (len(grid_buttons) // width))[:-1]})
+
+    def create_more_rows_button(self, on_click):
+        """
+            This function creates a button which renders the next rows of the grid in the lazy mode
+        :param on_click: a function which renders the next rows
+        :return:
+        """
+        self.more_rows_button = widgets.Button(description=self.settings.button_pool.get("MORE_ROWS_DESCRIPTION"),
+                                               layout={"width": self.settings.width})
+        self.more_rows_button.on_click(on_click)
+
+    def create_canvas(self):
+        """
+            This function creates an image widget to draw the whole board on
+        :return:
+        """
+        self.canvas = widgets.Image(format="png", layout={"max_width": self.settings.width,
+                                                          "border": self.settings.borders.get("CELL")})
+
+    def append_grid_buttons(self, grid_buttons, width):
+        """
+            This function appends rows of buttons to the grid layout as a new block, so only the list of blocks is
+            synced, and buttons which are already shown are not
+        :param grid_buttons: a list of buttons of whole rows
+        :param width: int, a number of columns
+        :return:
+        """
+        self.grid.children += (self.create_grid_block(grid_buttons, width),)
 
     def create_main_menu_widgets(self):
         """
@@ -44,10 +95,13 @@ class Widgets:
                                            layout={"margin": self.settings.layout_margin},
                                            continuous_update=self.settings.continuous_update)
 
-        # a matrix size widget
+        # a matrix size widget, the canvas backend draws larger boards than the grid of buttons
+        max_matrix_size = self.settings.matrix_size.get("MAX")
+        if self.settings.renderer.get("BACKEND") == "canvas":
+            max_matrix_size = self.settings.renderer.get("CANVAS").get("MATRIX_SIZE_MAX")
         self.matrix_size = widgets.IntSlider(value=self.settings.matrix_size.get("VALUE"),
                                              min=self.settings.matrix_size.get("MIN"),
-                                             max=self.settings.matrix_size.get("MAX"),
+                                             max=max_matrix_size,
                                              step=self.settings.matrix_size.get("STEP"),
                                              description=self.settings.matrix_size.get("DESCRIPTION"),
                                              style={"description_width": self.settings.description_width,
@@ -88,6 +142,11 @@ class Widgets:
                                                    "height": self.settings.height,
                                                    "border": self.settings.borders.get("BUTTON")})
 
+        # a toggle of the flag mode, clicks flag cells while it is on
+        self.flag_mode = widgets.ToggleButton(value=False, description=self.settings.flag_button.get("DESCRIPTION"),
+                                              tooltip=self.settings.flag_button.get("TOOLTIP"), icon="flag",
+                                              layout={"margin": self.settings.layout_margin})
+
         self.output = widgets.Output()
 
     def link_widgets(self):
@@ -100,7 +159,7 @@ class Widgets:
                                             "width": self.settings.width,
                                             "justify_content": self.settings.alignment.get("CENTER")})
 
-        ui_info = widgets.HBox(children=[self.restarted, self.progress_bar],
+        ui_info = widgets.HBox(children=[self.restarted, self.progress_bar, self.flag_mode],
                                layout={"align_items": self.settings.alignment.get("STRETCH"),
                                        "width": self.settings.width,
                                        "justify_content": self.settings.alignment.get("CENTER")})
@@ -112,12 +171,26 @@ class Widgets:
                                        "padding": self.settings.layout_margin,
                                        "border": self.settings.borders.get("APP")})
 
+    def get_board_shape(self):
+        """
+            This function returns a height and a width of a board of the chosen matrix size, the width is scaled by
+            the ratio from the settings
+        :return:
+            height - int
+            width - int
+        """
+        height = self.matrix_size.value
+        width_ratio = (self.settings.board or {}).get("WIDTH_RATIO", 1)
+
+        return height, max(self.matrix_size.min, round(height * width_ratio))
+
     def calculate_n_of_cells_to_open(self):
         """
             This function calculates # of cells to open to win the game
         :return:
         """
-        self.n_of_cells_to_open = self.matrix_size.value ** 2 - self.n_black_holes.value
+        height, width = self.get_board_shape()
+        self.n_of_cells_to_open = height * width - self.n_black_holes.value
 
     def update_widgets(self, button_color=None, description=None, validation_description=None,
                        progress_value=None, progress_tooltip=None):